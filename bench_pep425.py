@@ -0,0 +1,112 @@
+"""Benchmarks for pep425 using pytest-benchmark.
+
+Run with ``python -m pytest bench_pep425.py --benchmark-autosave`` to store the
+results under .benchmarks/ and ``--benchmark-compare`` to compare against the
+last stored run.
+
+"""
+import platform
+
+import pytest
+
+import pep425
+
+pytest.importorskip("pytest_benchmark")
+
+
+MULTI_PLATFORM_TAGS = [
+    "cp37-cp37m-macosx_10_6_intel.macosx_10_9_intel.macosx_10_9_x86_64.macosx_10_10_intel.macosx_10_10_x86_64",
+    "cp27-cp27m-macosx_10_6_intel.macosx_10_9_intel.macosx_10_9_x86_64.macosx_10_10_intel.macosx_10_10_x86_64",
+    "cp36.cp37-cp36m.cp37m-manylinux1_i686.manylinux1_x86_64",
+    "py2.py3-none-macosx_10_6_intel.macosx_10_9_x86_64.manylinux1_x86_64.win32.win_amd64",
+]
+
+# File names from https://pypi.org/project/{pip,numpy,mysql-connector-python}/#files
+WHEEL_FILENAMES = [
+    "pip-18.0-py2.py3-none-any.whl",
+    "pip-10.0.1-py2.py3-none-any.whl",
+    "numpy-1.15.0-cp27-cp27m-macosx_10_6_intel.macosx_10_9_intel.macosx_10_9_x86_64.macosx_10_10_intel.macosx_10_10_x86_64.whl",
+    "numpy-1.15.0-cp27-cp27m-manylinux1_i686.whl",
+    "numpy-1.15.0-cp27-cp27m-manylinux1_x86_64.whl",
+    "numpy-1.15.0-cp27-cp27mu-manylinux1_i686.whl",
+    "numpy-1.15.0-cp27-cp27mu-manylinux1_x86_64.whl",
+    "numpy-1.15.0-cp27-none-win32.whl",
+    "numpy-1.15.0-cp27-none-win_amd64.whl",
+    "numpy-1.15.0-cp34-cp34m-macosx_10_6_intel.macosx_10_9_intel.macosx_10_9_x86_64.macosx_10_10_intel.macosx_10_10_x86_64.whl",
+    "numpy-1.15.0-cp34-cp34m-manylinux1_i686.whl",
+    "numpy-1.15.0-cp34-cp34m-manylinux1_x86_64.whl",
+    "numpy-1.15.0-cp34-none-win32.whl",
+    "numpy-1.15.0-cp34-none-win_amd64.whl",
+    "numpy-1.15.0-cp35-cp35m-macosx_10_6_intel.macosx_10_9_intel.macosx_10_9_x86_64.macosx_10_10_intel.macosx_10_10_x86_64.whl",
+    "numpy-1.15.0-cp35-cp35m-manylinux1_i686.whl",
+    "numpy-1.15.0-cp35-cp35m-manylinux1_x86_64.whl",
+    "numpy-1.15.0-cp35-none-win32.whl",
+    "numpy-1.15.0-cp35-none-win_amd64.whl",
+    "numpy-1.15.0-cp36-cp36m-macosx_10_6_intel.macosx_10_9_intel.macosx_10_9_x86_64.macosx_10_10_intel.macosx_10_10_x86_64.whl",
+    "numpy-1.15.0-cp36-cp36m-manylinux1_i686.whl",
+    "numpy-1.15.0-cp36-cp36m-manylinux1_x86_64.whl",
+    "numpy-1.15.0-cp36-none-win32.whl",
+    "numpy-1.15.0-cp36-none-win_amd64.whl",
+    "numpy-1.15.0-cp37-cp37m-macosx_10_6_intel.macosx_10_9_intel.macosx_10_9_x86_64.macosx_10_10_intel.macosx_10_10_x86_64.whl",
+    "numpy-1.15.0-cp37-cp37m-manylinux1_i686.whl",
+    "numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl",
+    "numpy-1.15.0-cp37-none-win32.whl",
+    "numpy-1.15.0-cp37-none-win_amd64.whl",
+    "mysql_connector_python-8.0.12-cp27-cp27m-macosx_10_12_x86_64.whl",
+    "mysql_connector_python-8.0.12-cp27-cp27m-manylinux1_i686.whl",
+    "mysql_connector_python-8.0.12-cp27-cp27mu-manylinux1_x86_64.whl",
+    "mysql_connector_python-8.0.12-cp27-cp27m-win_amd64.whl",
+    "mysql_connector_python-8.0.12-cp34-cp34m-manylinux1_x86_64.whl",
+    "mysql_connector_python-8.0.12-cp35-cp35m-macosx_10_12_x86_64.whl",
+    "mysql_connector_python-8.0.12-cp35-cp35m-manylinux1_x86_64.whl",
+    "mysql_connector_python-8.0.12-cp35-cp35m-win_amd64.whl",
+    "mysql_connector_python-8.0.12-cp36-cp36m-macosx_10_12_x86_64.whl",
+    "mysql_connector_python-8.0.12-cp36-cp36m-manylinux1_x86_64.whl",
+    "mysql_connector_python-8.0.12-cp36-cp36m-win_amd64.whl",
+    "mysql_connector_python-8.0.12-cp37-cp37m-macosx_10_13_x86_64.whl",
+    "mysql_connector_python-8.0.12-cp37-cp37m-manylinux1_x86_64.whl",
+    "mysql_connector_python-8.0.12-cp37-cp37m-win_amd64.whl",
+    "mysql_connector_python-8.0.12-py2.py3-none-any.whl",
+]
+
+
+def _parse_all(parse, items):
+    for item in items:
+        parse(item)
+
+
+def test_parse_tag_multi_platform(benchmark):
+    benchmark(_parse_all, pep425.parse_tag, MULTI_PLATFORM_TAGS)
+
+
+def test_parse_wheel_tag(benchmark):
+    benchmark(_parse_all, pep425.parse_wheel_tag, WHEEL_FILENAMES)
+
+
+def test_sys_tags(benchmark):
+    benchmark(lambda: list(pep425.sys_tags()))
+
+
+MAC_VERSIONS = [(10, minor) for minor in range(0, 17)] + [
+    (major, 0) for major in range(11, 16)
+]
+
+
+@pytest.mark.parametrize("version", MAC_VERSIONS)
+@pytest.mark.parametrize("arch", ["x86_64", "i386", "ppc64", "ppc", "arm64"])
+def test_mac_platforms(benchmark, version, arch):
+    benchmark(pep425._mac_platforms, version, arch)
+
+
+@pytest.mark.skipif(
+    platform.system() != "Linux" or platform.libc_ver()[0] != "glibc",
+    reason="requires glibc",
+)
+def test_have_compatible_glibc(benchmark):
+    # Clear the cached version every round so each call queries glibc again.
+    benchmark.pedantic(
+        pep425._have_compatible_glibc,
+        args=(2, 5),
+        setup=pep425._glibc_version_cache.clear,
+        rounds=1000,
+    )
@@ -1,11 +1,16 @@
 """Provide support for PEP 425 compatibility tags triples."""
 
-import distutils.util
+import array
+import bisect
+import collections
 import os
 import os.path
-import platform
+import re
 import sys
-import sysconfig
+
+# Everything else is imported where it is used so that importing this module
+# stays cheap for code which only parses tags; the modules above are cheap to
+# import and used on hot paths.
 
 
 INTERPRETER_SHORT_NAMES = {
@@ -20,11 +25,20 @@ INTERPRETER_SHORT_NAMES = {
 _32_BIT_INTERPRETER = sys.maxsize <= 2 ** 32
 
 
+# Interned Tag instances keyed by the lowercased triple; see clear_interned().
+_INTERNED_TAGS = {}
+
+# Interned results of parse_tag() for platform-independent tag strings.
+_INTERNED_TAG_SETS = {}
+
+
 # A dataclass would be better, but Python 2.7. :(
 class Tag:
 
     """Representation of the interpreter/ABI/platform tag triple as specified by PEP 425."""
 
+    __slots__ = ["_tags", "_hash"]
+
     def __init__(self, interpreter, abi, platform):
         """Initialize the instance attributes.
 
@@ -32,12 +46,37 @@ class Tag:
 
         """
         self._tags = interpreter.lower(), abi.lower(), platform.lower()
+        self._hash = hash(self._tags)
+
+    @classmethod
+    def intern(cls, interpreter, abi, platform):
+        """Return the shared instance for the tag triple.
+
+        Equal triples always return the same object, which saves memory when
+        holding large numbers of tags. Interning is opt-in; parse_tag() and
+        ParseCache do not intern their results. Interned tags are kept until
+        clear_interned() is called.
+
+        """
+        key = interpreter.lower(), abi.lower(), platform.lower()
+        try:
+            return _INTERNED_TAGS[key]
+        except KeyError:
+            pass
+        return _INTERNED_TAGS.setdefault(key, cls(*key))
 
     def __eq__(self, other):
         return self._tags == other._tags
 
     def __hash__(self):
-        return hash(self._tags)
+        return self._hash
+
+    def __getstate__(self):
+        return self._tags
+
+    def __setstate__(self, state):
+        self._tags = state
+        self._hash = hash(state)
 
     def __str__(self):
         return "-".join(self._tags)
@@ -65,24 +104,272 @@ def parse_tag(tag):
     compressed tag triples.
 
     """
+    try:
+        return _INTERNED_TAG_SETS[tag]
+    except KeyError:
+        pass
     tags = set()
     interpreters, abis, platforms = tag.split("-")
     for interpreter in interpreters.split("."):
         for abi in abis.split("."):
             for platform in platforms.split("."):
                 tags.add(Tag(interpreter, abi, platform))
-    return frozenset(tags)
+    tags = frozenset(tags)
+    # Pure Python wheels make up most of any index and only use a handful of
+    # distinct tag strings, so share their results.
+    if platforms == "any":
+        _INTERNED_TAG_SETS[tag] = tags
+    return tags
 
 
-def parse_wheel_tag(path):
-    """Parse the path of a wheel file for its tag triple(s)."""
+def clear_interned():
+    """Drop the interned tags and parse results shared by the parse functions.
+
+    Long-running processes parsing arbitrary input can call this periodically
+    to bound memory use. Tags still referenced elsewhere remain valid; they are
+    merely no longer shared with tags created afterwards.
+
+    """
+    _INTERNED_TAGS.clear()
+    _INTERNED_TAG_SETS.clear()
+    _PLATFORM_TAGS.clear()
+
+
+class TagProduct:
+
+    """Lazy set of the tag triples of a compressed tag.
+
+    Only the sets of interpreters, ABIs and platforms are stored; Tag objects
+    are only created when iterating. It compares equal to the frozenset
+    returned by parse_tag() for the same tag.
+
+    """
+
+    __slots__ = ["interpreters", "abis", "platforms", "_hash"]
+
+    def __init__(self, interpreters, abis, platforms):
+        """Initialize the instance attributes.
+
+        All values are lowercased.
+
+        """
+        self.interpreters = frozenset(value.lower() for value in interpreters)
+        self.abis = frozenset(value.lower() for value in abis)
+        self.platforms = frozenset(value.lower() for value in platforms)
+        self._hash = None
+
+    def __len__(self):
+        return len(self.interpreters) * len(self.abis) * len(self.platforms)
+
+    def __iter__(self):
+        for interpreter in self.interpreters:
+            for abi in self.abis:
+                for platform in self.platforms:
+                    yield Tag(interpreter, abi, platform)
+
+    def __contains__(self, tag):
+        if not isinstance(tag, Tag):
+            return False
+        interpreter, abi, platform = tag._tags
+        return (
+            interpreter in self.interpreters
+            and abi in self.abis
+            and platform in self.platforms
+        )
+
+    def __eq__(self, other):
+        if isinstance(other, TagProduct):
+            if not len(self) or not len(other):
+                return len(self) == len(other)
+            return (
+                self.interpreters == other.interpreters
+                and self.abis == other.abis
+                and self.platforms == other.platforms
+            )
+        elif isinstance(other, (set, frozenset)):
+            return len(self) == len(other) and all(tag in self for tag in other)
+        return NotImplemented
+
+    def __hash__(self):
+        # Must match the hash of the equal frozenset.
+        if self._hash is None:
+            self._hash = hash(frozenset(self))
+        return self._hash
+
+    def __repr__(self):
+        return "<TagProduct {}>".format(
+            "-".join(
+                ".".join(sorted(values))
+                for values in (self.interpreters, self.abis, self.platforms)
+            )
+        )
+
+    def isdisjoint(self, tags):
+        """Return True if none of 'tags' are in this set."""
+        return not any(tag in self for tag in tags)
+
+    def intersection(self, tags):
+        """Return the frozenset of 'tags' which are also in this set.
+
+        The tags in the result are the objects from 'tags'.
+
+        """
+        return frozenset(tag for tag in tags if tag in self)
+
+
+def parse_tag_product(tag):
+    """Parse the tag triple into a TagProduct.
+
+    This is the lazy equivalent of parse_tag().
+
+    """
+    interpreters, abis, platforms = tag.split("-")
+    return TagProduct(interpreters.split("."), abis.split("."), platforms.split("."))
+
+
+def _wheel_tag_string(path):
+    """Return the compressed tag triple from the path of a wheel file."""
     name = os.path.splitext(path)[0]
     parts = 3
     index = len(name)
     while parts:
         index = name.rindex("-", 0, index)
         parts -= 1
-    return parse_tag(name[index + 1 :])
+    return name[index + 1 :]
+
+
+def parse_wheel_tag(path):
+    """Parse the path of a wheel file for its tag triple(s)."""
+    return parse_tag(_wheel_tag_string(path))
+
+
+def parse_wheel_tag_product(path):
+    """Parse the path of a wheel file for its tag triple(s) as a TagProduct."""
+    return parse_tag_product(_wheel_tag_string(path))
+
+
+WheelFilename = collections.namedtuple(
+    "WheelFilename", ["name", "version", "build", "tags"]
+)
+WheelFilename.__doc__ = """The parts of a wheel file name as specified by PEP 427.
+
+'build' is an empty tuple when the file has no build tag and otherwise a tuple
+of the build number and the rest of the build tag, so that builds sort as
+PEP 427 specifies.
+
+"""
+
+
+def _split_wheel_filename(path):
+    """Return the file name of a wheel file and its dash-separated parts.
+
+    ValueError is raised if the file name is not a valid wheel file name.
+
+    """
+    filename = os.path.basename(os.fspath(path))
+    if not filename.endswith(".whl"):
+        raise ValueError("invalid wheel file name: {!r}".format(filename))
+    parts = filename[: -len(".whl")].split("-")
+    if len(parts) not in (5, 6) or not all(parts):
+        raise ValueError("invalid wheel file name: {!r}".format(filename))
+    # A build tag has to start with a digit.
+    if len(parts) == 6 and not "0" <= parts[2][0] <= "9":
+        raise ValueError("invalid wheel file name: {!r}".format(filename))
+    return filename, parts
+
+
+def parse_wheel_filename(path):
+    """Parse the path of a wheel file into a WheelFilename.
+
+    ValueError is raised if the file name is not a valid wheel file name.
+
+    """
+    _, parts = _split_wheel_filename(path)
+    if len(parts) == 5:
+        build = ()
+    else:
+        build_tag = parts[2]
+        digits = len(build_tag) - len(build_tag.lstrip("0123456789"))
+        build = int(build_tag[:digits]), build_tag[digits:]
+    tags = parse_tag("-".join(parts[-3:]))
+    return WheelFilename(parts[0], parts[1], build, tags)
+
+
+def parse_wheel_filenames(paths, skip_invalid=False):
+    """Parse the paths of wheel files into a list of WheelFilename objects.
+
+    Invalid file names raise ValueError unless 'skip_invalid' is true, in which
+    case they are left out.
+
+    """
+    parsed = []
+    for path in paths:
+        try:
+            parsed.append(parse_wheel_filename(path))
+        except ValueError:
+            if not skip_invalid:
+                raise
+    return parsed
+
+
+class ParseCache:
+
+    """Bounded LRU cache for parse_tag() and parse_wheel_tag().
+
+    Both methods share the same cache since wheel files are cached by their
+    tag string. Once 'maxsize' tag strings are cached, the least recently used
+    one is evicted.
+
+    """
+
+    def __init__(self, maxsize=1024):
+        import functools
+
+        self.maxsize = maxsize
+        self._parse_tag = functools.lru_cache(maxsize=maxsize)(parse_tag)
+
+    def parse_tag(self, tag):
+        """Cached version of parse_tag()."""
+        return self._parse_tag(tag)
+
+    def parse_wheel_tag(self, path):
+        """Cached version of parse_wheel_tag()."""
+        return self._parse_tag(_wheel_tag_string(path))
+
+    def clear(self):
+        """Empty the cache and reset the statistics."""
+        self._parse_tag.cache_clear()
+
+    def stats(self):
+        """Return a dict of the hits, misses, size and maxsize of the cache."""
+        info = self._parse_tag.cache_info()
+        return {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "maxsize": info.maxsize,
+        }
+
+
+def _get_config_var(name):
+    """Look up a configuration variable of the running interpreter."""
+    import sysconfig
+
+    return sysconfig.get_config_var(name)
+
+
+def _get_platform():
+    """Return the platform of the running interpreter, e.g. "linux-x86_64"."""
+    import distutils.util
+
+    return distutils.util.get_platform()
+
+
+def _mac_ver():
+    """Return the macOS version details of the running OS."""
+    import platform
+
+    return platform.mac_ver()
 
 
 def _normalize_string(string):
@@ -97,36 +384,52 @@ def _cpython_interpreter(py_version):
 
 def _cpython_abi(py_version):
     """Calcuate the ABI for this CPython interpreter."""
-    soabi = sysconfig.get_config_var("SOABI")
+    soabi = _get_config_var("SOABI")
     if soabi:
-        _, options, _ = soabi.split("-")
+        # e.g. "cpython-37m-darwin" or "cpython-311-x86_64-linux-gnu".
+        options = soabi.split("-")[1]
     else:
         found_options = [str(py_version[0]), str(py_version[1])]
-        if sysconfig.get_config_var("Py_DEBUG"):
+        if _get_config_var("Py_DEBUG"):
             found_options.append("d")
-        if sysconfig.get_config_var("WITH_PYMALLOC"):
+        if _get_config_var("WITH_PYMALLOC"):
             found_options.append("m")
-        if sysconfig.get_config_var("Py_UNICODE_SIZE") == 4:
+        if _get_config_var("Py_UNICODE_SIZE") == 4:
             found_options.append("u")
         options = "".join(found_options)
     return "cp{options}".format(options=options)
 
 
+def _expand_blocks(blocks):
+    """Yield the tags of a sequence of (interpreters, abis, platforms) blocks.
+
+    Each block is the product of its components, with the platform varying
+    fastest and the interpreter slowest.
+
+    """
+    for interpreters, abis, platforms in blocks:
+        for interpreter in interpreters:
+            for abi in abis:
+                for platform in platforms:
+                    yield Tag(interpreter, abi, platform)
+
+
+def _cpython_blocks(py_version, interpreter, abi, platforms):
+    blocks = [([interpreter], [abi, "abi3", "none"], platforms)]
+    # PEP 384 was first implemented in Python 3.2.
+    older_interpreters = [
+        "cp{major}{minor}".format(major=py_version[0], minor=minor_version)
+        for minor_version in range(py_version[1] - 1, 1, -1)
+    ]
+    if older_interpreters:
+        blocks.append((older_interpreters, ["abi3"], platforms))
+    return blocks
+
+
 def _cpython_tags(py_version, interpreter, abi, platforms):
-    for tag in (Tag(interpreter, abi, platform) for platform in platforms):
-        yield tag
-    for tag in (Tag(interpreter, "abi3", platform) for platform in platforms):
+    blocks = _cpython_blocks(py_version, interpreter, abi, platforms)
+    for tag in _expand_blocks(blocks):
         yield tag
-    for tag in (Tag(interpreter, "none", platform) for platform in platforms):
-        yield tag
-    # PEP 384 was first implemented in Python 3.2.
-    for minor_version in range(py_version[1] - 1, 1, -1):
-        for platform in platforms:
-            yield Tag(
-                "cp{major}{minor}".format(major=py_version[0], minor=minor_version),
-                "abi3",
-                platform,
-            )
 
 
 def _pypy_interpreter():
@@ -139,26 +442,32 @@ def _pypy_interpreter():
 
 def _generic_abi():
     """Get the ABI version for this interpreter."""
-    abi = sysconfig.get_config_var("SOABI")
+    abi = _get_config_var("SOABI")
     if abi:
         return _normalize_string(abi)
     else:
         return "none"
 
 
+def _pypy_blocks(py_version, interpreter, abi, platforms):
+    return [([interpreter], [abi, "none"], platforms)]
+
+
 def _pypy_tags(py_version, interpreter, abi, platforms):
-    for tag in (Tag(interpreter, abi, platform) for platform in platforms):
-        yield tag
-    for tag in (Tag(interpreter, "none", platform) for platform in platforms):
+    blocks = _pypy_blocks(py_version, interpreter, abi, platforms)
+    for tag in _expand_blocks(blocks):
         yield tag
 
 
+def _generic_blocks(interpreter, py_version, abi, platforms):
+    abis = [abi, "none"] if abi != "none" else [abi]
+    return [([interpreter], abis, platforms)]
+
+
 def _generic_tags(interpreter, py_version, abi, platforms):
-    for tag in (Tag(interpreter, abi, platform) for platform in platforms):
+    blocks = _generic_blocks(interpreter, py_version, abi, platforms)
+    for tag in _expand_blocks(blocks):
         yield tag
-    if abi != "none":
-        for tag in (Tag(interpreter, "none", platform) for platform in platforms):
-            yield tag
 
 
 def _py_interpreter_range(py_version):
@@ -182,12 +491,17 @@ def _independent_tags(interpreter, py_version, platforms):
     - <interpreter>-none-any
     - py*-none-any
     """
-    for version in _py_interpreter_range(py_version):
-        for platform in platforms:
-            yield Tag(version, "none", platform)
-    yield Tag(interpreter, "none", "any")
-    for version in _py_interpreter_range(py_version):
-        yield Tag(version, "none", "any")
+    for tag in _expand_blocks(_independent_blocks(interpreter, py_version, platforms)):
+        yield tag
+
+
+def _independent_blocks(interpreter, py_version, platforms):
+    versions = list(_py_interpreter_range(py_version))
+    return [
+        (versions, ["none"], platforms),
+        ([interpreter], ["none"], ["any"]),
+        (versions, ["none"], ["any"]),
+    ]
 
 
 def _mac_arch(arch, is_32bit=_32_BIT_INTERPRETER):
@@ -226,22 +540,46 @@ def _mac_binary_formats(version, cpu_arch):
         else:
             return []
 
-    formats.append("universal")
+    if cpu_arch in ("arm64", "x86_64"):
+        formats.append("universal2")
+    if cpu_arch in ("x86_64", "i386", "ppc64", "ppc"):
+        formats.append("universal")
     return formats
 
 
+def _mac_compatible_formats(version, arch):
+    """Return the binary formats of 'version' which run on an 'arch' Mac."""
+    if version < (11, 0) and arch == "arm64":
+        # arm64 Macs appeared with macOS 11, so older releases only have arm64
+        # code in universal2 binaries.
+        return ["universal2"] if version >= (10, 4) else []
+    return _mac_binary_formats(version, arch)
+
+
 def _mac_platforms(version=None, arch=None):
-    """Calculate the platform tags for macOS."""
-    version_str, _, cpu_arch = platform.mac_ver()
-    if version is None:
-        version = tuple(map(int, version_str.split(".")[:2]))
-    if arch is None:
-        arch = _mac_arch(cpu_arch)
+    """Calculate the platform tags for macOS.
+
+    The running OS is only queried for the details not provided.
+
+    """
+    if version is None or arch is None:
+        version_str, _, cpu_arch = _mac_ver()
+        if version is None:
+            version = tuple(map(int, version_str.split(".")[:2]))
+        if arch is None:
+            arch = _mac_arch(cpu_arch)
+    if version >= (11, 0):
+        # Since macOS 11 every yearly release bumps the major version and the
+        # minor versions are the updates in between, so wheels only target
+        # major versions. These releases run the binaries of all earlier ones,
+        # down to the 10.x series which ended with 10.16.
+        compat_versions = [(major, 0) for major in range(version[0], 10, -1)]
+        compat_versions.extend((10, minor) for minor in range(16, -1, -1))
+    else:
+        compat_versions = [(version[0], minor) for minor in range(version[1], -1, -1)]
     platforms = []
-    for minor_version in range(version[1], -1, -1):
-        compat_version = version[0], minor_version
-        binary_formats = _mac_binary_formats(compat_version, cpu_arch)
-        for binary_format in binary_formats:
+    for compat_version in compat_versions:
+        for binary_format in _mac_compatible_formats(compat_version, arch):
             platforms.append(
                 "macosx_{major}_{minor}_{binary_format}".format(
                     major=compat_version[0],
@@ -252,40 +590,75 @@ def _mac_platforms(version=None, arch=None):
     return platforms
 
 
-def _windows_platforms():
-    # XXX Is this function even necessary?
-    raise NotImplementedError
+_WINDOWS_PLATFORMS = {
+    "x86": "win32",
+    "i386": "win32",
+    "i686": "win32",
+    "win32": "win32",
+    "amd64": "win_amd64",
+    "x86_64": "win_amd64",
+    "arm64": "win_arm64",
+    "aarch64": "win_arm64",
+}
 
 
-# From PEP 513.
-def _is_manylinux1_compatible(platform):
-    if platform not in ["linux_x86_64", "linux_i686"]:
-        return False
+def _windows_platforms(arch=None):
+    """Calculate the platform tags for Windows.
 
-    # Check for presence of _manylinux module.
+    The running OS is queried if 'arch' is not provided.
+
+    """
+    if arch is None:
+        return _generic_platforms()
+    arch = arch.lower()
     try:
-        import _manylinux
+        return [_WINDOWS_PLATFORMS[arch]]
+    except KeyError:
+        return ["win_{arch}".format(arch=_normalize_string(arch))]
+
+
+# The glibc versions the legacy manylinux tags of PEP 513, 571 and 599 are
+# aliases of, along with the architectures they were defined for.
+_LEGACY_MANYLINUX = {
+    (2, 17): (
+        "manylinux2014",
+        ["x86_64", "i686", "aarch64", "armv7l", "ppc64", "ppc64le", "s390x"],
+    ),
+    (2, 12): ("manylinux2010", ["x86_64", "i686"]),
+    (2, 5): ("manylinux1", ["x86_64", "i686"]),
+}
 
-        return bool(_manylinux.manylinux1_compatible)
-    except (ImportError, AttributeError):
-        # Fall through to heuristic check below.
-        pass
+# Cache of the glibc version of the running process; see _glibc_version_string().
+_glibc_version_cache = {}
 
-    # Check glibc version. CentOS 5 uses glibc 2.5.
-    return have_compatible_glibc(2, 5)
 
+def _glibc_version_string_confstr():
+    """Return the glibc version from os.confstr(), or None if unavailable."""
+    try:
+        # Returns a string like "glibc 2.17".
+        _, version_str = os.confstr("CS_GNU_LIBC_VERSION").split()
+    except (AttributeError, OSError, ValueError):
+        return None
+    return version_str
 
-# From PEP 513.
-def _have_compatible_glibc(major, minimum_minor):
-    import ctypes
 
-    process_namespace = ctypes.CDLL(None)
+def _glibc_version_string_ctypes():
+    """Return the glibc version using ctypes, or None if not linked to glibc."""
+    try:
+        import ctypes
+    except ImportError:
+        return None
+
+    try:
+        process_namespace = ctypes.CDLL(None)
+    except OSError:
+        return None
     try:
         gnu_get_libc_version = process_namespace.gnu_get_libc_version
     except AttributeError:
         # Symbol doesn't exist -> therefore, we are not linked to
         # glibc.
-        return False
+        return None
 
     # Call gnu_get_libc_version, which returns a string like "2.5".
     gnu_get_libc_version.restype = ctypes.c_char_p
@@ -293,10 +666,42 @@ def _have_compatible_glibc(major, minimum_minor):
     # py2 / py3 compatibility:
     if not isinstance(version_str, str):
         version_str = version_str.decode("ascii")
+    return version_str
+
+
+def _glibc_version_string():
+    """Return the glibc version of the running process, or None if not glibc.
+
+    os.confstr() is tried before falling back to loading the process with
+    ctypes. The result is cached for the life of the process.
+
+    """
+    try:
+        return _glibc_version_cache["version"]
+    except KeyError:
+        pass
+    version_str = _glibc_version_string_confstr() or _glibc_version_string_ctypes()
+    _glibc_version_cache["version"] = version_str
+    return version_str
 
-    # Parse string and check against requested version.
-    version = [int(piece) for piece in version_str.split(".")]
-    assert len(version) == 2
+
+def _glibc_version():
+    """Return the glibc version as a (major, minor) tuple, or None if not glibc."""
+    version_str = _glibc_version_string()
+    if version_str is None:
+        return None
+    # Development builds can have versions such as "2.28.9000".
+    match = re.match(r"(\d+)\.(\d+)", version_str)
+    if match is None:
+        return None
+    return int(match.group(1)), int(match.group(2))
+
+
+# From PEP 513.
+def _have_compatible_glibc(major, minimum_minor):
+    version = _glibc_version()
+    if version is None:
+        return False
     if major != version[0]:
         return False
     if minimum_minor > version[1]:
@@ -304,30 +709,100 @@ def _have_compatible_glibc(major, minimum_minor):
     return True
 
 
+# From PEP 600.
+def _is_manylinux_compatible(glibc_version, arch):
+    """Check the _manylinux module for an override of glibc compatibility."""
+    try:
+        import _manylinux
+    except ImportError:
+        return True
+    if hasattr(_manylinux, "manylinux_compatible"):
+        result = _manylinux.manylinux_compatible(*glibc_version, arch)
+        if result is not None:
+            return bool(result)
+        return True
+    if glibc_version in _LEGACY_MANYLINUX:
+        name, _ = _LEGACY_MANYLINUX[glibc_version]
+        try:
+            return bool(getattr(_manylinux, name + "_compatible"))
+        except AttributeError:
+            pass
+    return True
+
+
+def _manylinux_platforms(arch, glibc_version, is_compatible=None):
+    """Yield the manylinux platform tags for 'arch' and glibc 'glibc_version'.
+
+    The tags are in descending order of glibc version, with the legacy
+    manylinux1/2010/2014 tags following their equivalent PEP 600 tags. If given,
+    'is_compatible' is called with each glibc version and architecture to
+    filter out versions.
+
+    """
+    major, newest_minor = glibc_version[:2]
+    if major != 2:
+        return
+    # manylinux1 (glibc 2.5) only supported x86 and other architectures first
+    # appeared with manylinux2014 (glibc 2.17).
+    oldest_minor = 5 if arch in ("x86_64", "i686") else 17
+    for minor in range(newest_minor, oldest_minor - 1, -1):
+        version = major, minor
+        if is_compatible is not None and not is_compatible(version, arch):
+            continue
+        yield "manylinux_{major}_{minor}_{arch}".format(
+            major=major, minor=minor, arch=arch
+        )
+        if version in _LEGACY_MANYLINUX:
+            name, arches = _LEGACY_MANYLINUX[version]
+            if arch in arches:
+                yield "{name}_{arch}".format(name=name, arch=arch)
+
+
 def _linux_platforms(is_32bit=_32_BIT_INTERPRETER):
     """Return the supported platforms on Linux."""
-    linux = _normalize_string(distutils.util.get_platform())
+    linux = _normalize_string(_get_platform())
     if linux == "linux_x86_64" and is_32bit:
         linux = "linux_i686"
-    platforms = [linux]
-    if _is_manylinux1_compatible(linux):
-        platforms.append(linux.replace("linux", "manylinux1"))
+    arch = linux.partition("_")[2]
+    platforms = []
+    glibc_version = _glibc_version()
+    if glibc_version is not None:
+        platforms.extend(
+            _manylinux_platforms(arch, glibc_version, _is_manylinux_compatible)
+        )
+    platforms.append(linux)
+    return platforms
+
+
+def _linux_target_platforms(arch, libc_version=None):
+    """Calculate the platform tags for Linux on 'arch' with glibc 'libc_version'.
+
+    Without a glibc version, only the plain linux_<arch> tag is supported.
+
+    """
+    arch = _normalize_string(arch)
+    platforms = []
+    if libc_version is not None:
+        platforms.extend(_manylinux_platforms(arch, libc_version))
+    platforms.append("linux_{arch}".format(arch=arch))
     return platforms
 
 
 def _generic_platforms():
-    platform = _normalize_string(distutils.util.get_platform())
+    platform = _normalize_string(_get_platform())
     return [platform]
 
 
 def _interpreter_name():
     """Return the name of the running interpreter."""
+    import platform
+
     name = platform.python_implementation().lower()
     return INTERPRETER_SHORT_NAMES.get(name) or name
 
 
 def _generic_interpreter(name, py_version):
-    version = sysconfig.get_config_var("py_version_nodot")
+    version = _get_config_var("py_version_nodot")
     if not version:
         version = "".join(py_version[:2])
     return "{name}{version}".format(name=name, version=version)
@@ -340,38 +815,2449 @@ def sys_tags():
     from most to least important.
 
     """
+    return _tags(*_sys_details())
+
+
+def _sys_details():
+    """Return the interpreter name, Python version, interpreter, ABI and platforms.
+
+    These are the details the tags of the running interpreter are calculated
+    from.
+
+    """
+    import platform
+
     py_version = sys.version_info[:2]
     interpreter_name = _interpreter_name()
     if platform.system() == "Darwin":
         platforms = _mac_platforms()
-    elif platform.system == "Linux":
+    elif platform.system() == "Linux":
         platforms = _linux_platforms()
+    elif platform.system() == "Windows":
+        platforms = _windows_platforms()
     else:
         platforms = _generic_platforms()
 
     if interpreter_name == "cp":
         interpreter = _cpython_interpreter(py_version)
         abi = _cpython_abi(py_version)
-        for tag in _cpython_tags(py_version, interpreter, abi, platforms):
-            yield tag
     elif interpreter_name == "pp":
         interpreter = _pypy_interpreter()
         abi = _generic_abi()
-        for tag in _pypy_tags(py_version, interpreter, abi, platforms):
-            yield tag
     else:
         interpreter = _generic_interpreter(interpreter_name, py_version)
         abi = _generic_abi()
+    return interpreter_name, py_version, interpreter, abi, platforms
+
+
+def _tags(interpreter_name, py_version, interpreter, abi, platforms):
+    """Yield the tags for the interpreter in priority order."""
+    if interpreter_name == "cp":
+        for tag in _cpython_tags(py_version, interpreter, abi, platforms):
+            yield tag
+    elif interpreter_name == "pp":
+        for tag in _pypy_tags(py_version, interpreter, abi, platforms):
+            yield tag
+    else:
         for tag in _generic_tags(interpreter, py_version, abi, platforms):
             yield tag
     for tag in _independent_tags(interpreter, py_version, platforms):
         yield tag
 
 
-# XXX Test _linux_platforms()
-# XXX Test on Windows; should just work.
+def _tag_blocks(interpreter_name, py_version, interpreter, abi, platforms):
+    """Return the tags of _tags() as (interpreters, abis, platforms) blocks."""
+    if interpreter_name == "cp":
+        blocks = _cpython_blocks(py_version, interpreter, abi, platforms)
+    elif interpreter_name == "pp":
+        blocks = _pypy_blocks(py_version, interpreter, abi, platforms)
+    else:
+        blocks = _generic_blocks(interpreter, py_version, abi, platforms)
+    return blocks + _independent_blocks(interpreter, py_version, platforms)
+
+
+def target_tags(
+    implementation,
+    python_version,
+    abi=None,
+    platform="any",
+    arch=None,
+    libc_version=None,
+    macos_version=None,
+    interpreter=None,
+):
+    """Return the sequence of tag triples for an explicitly described interpreter.
+
+    Nothing about the running interpreter or OS is used, so the tags for any
+    deployment target can be calculated from anywhere.
+
+    'implementation' is the interpreter name, e.g. "cp" or "cpython".
+    'python_version' is a (major, minor) tuple. 'abi' defaults to the usual ABI
+    of CPython 3 for the version and "none" for other interpreters; it is
+    required for CPython 2.
+
+    'platform' is "linux", "macos", "windows" or an explicit platform tag. The
+    OS platforms need 'arch'; glibc-based Linux also takes 'libc_version' as a
+    (major, minor) tuple and macOS requires 'macos_version' as a (major, minor)
+    tuple.
+
+    'interpreter' is the interpreter tag, e.g. "pp360". It is required for
+    PyPy and otherwise calculated from 'implementation' and 'python_version'.
+
+    """
+    return _tags(
+        *_target_details(
+            implementation,
+            python_version,
+            abi,
+            platform,
+            arch,
+            libc_version,
+            macos_version,
+            interpreter,
+        )
+    )
 
 
-# XXX https://pypi.org/project/mysql-connector-python/#files
-# XXX https://pypi.org/project/pip/#files
-# XXX https://pypi.org/project/numpy/#files
+def _target_details(
+    implementation,
+    python_version,
+    abi,
+    platform,
+    arch,
+    libc_version,
+    macos_version,
+    interpreter,
+):
+    """Return the details to calculate the tags from for target_tags()."""
+    implementation = implementation.lower()
+    interpreter_name = INTERPRETER_SHORT_NAMES.get(implementation, implementation)
+    py_version = tuple(python_version[:2])
+    if interpreter is None:
+        if interpreter_name == "pp":
+            raise ValueError("the interpreter tag must be specified for PyPy")
+        interpreter = "{name}{major}{minor}".format(
+            name=interpreter_name, major=py_version[0], minor=py_version[1]
+        )
+    if abi is None:
+        if interpreter_name == "cp" and py_version[0] < 3:
+            # The ABI of CPython 2 depends on the width of its Unicode strings,
+            # e.g. "cp27mu" or "cp27m", which cannot be told from the version.
+            raise ValueError("the ABI must be specified for CPython 2")
+        elif interpreter_name == "cp":
+            # The pymalloc "m" flag was dropped from the ABI in Python 3.8.
+            flags = "m" if (3, 3) <= py_version < (3, 8) else ""
+            abi = "{interpreter}{flags}".format(interpreter=interpreter, flags=flags)
+        else:
+            abi = "none"
+
+    system = platform.lower()
+    if system in ("linux", "macos", "macosx", "darwin", "windows", "win32"):
+        if arch is None:
+            raise ValueError(
+                "the architecture must be specified for {}".format(platform)
+            )
+        if system == "linux":
+            platforms = _linux_target_platforms(arch, libc_version)
+        elif system == "windows" or system == "win32":
+            platforms = _windows_platforms(arch)
+        elif macos_version is None:
+            raise ValueError("the macOS version must be specified")
+        else:
+            platforms = _mac_platforms(tuple(macos_version[:2]), arch)
+    else:
+        platforms = [_normalize_string(system)]
+    return interpreter_name, py_version, interpreter, abi, platforms
+
+
+class TagSpace:
+
+    """The sequence of tags of an interpreter, computed arithmetically.
+
+    The tags of an interpreter are made up of a few blocks, each the product of
+    lists of interpreters, ABIs and platforms. Lookups work out a tag's position
+    from the positions of its components, so the tags are never materialized.
+    The sequence and the ranks are the same as those of sys_tags() or
+    target_tags() and TagPriorityIndex, respectively.
+
+    """
+
+    def __init__(self, blocks):
+        """Initialize from a sequence of (interpreters, abis, platforms) blocks."""
+        self._blocks = []
+        offset = 0
+        positions_cache = {}
+        for components in blocks:
+            components = tuple(
+                tuple(value.lower() for value in values) for values in components
+            )
+            size = len(components[0]) * len(components[1]) * len(components[2])
+            if not size:
+                continue
+            positions = []
+            for values in components:
+                # The platforms are typically shared by every block.
+                try:
+                    positions.append(positions_cache[values])
+                except KeyError:
+                    value_positions = {}
+                    for position, value in enumerate(values):
+                        value_positions.setdefault(value, position)
+                    positions_cache[values] = value_positions
+                    positions.append(value_positions)
+            self._blocks.append((offset, size, components, positions))
+            offset += size
+        self._length = offset
+
+    def __len__(self):
+        return self._length
+
+    def __iter__(self):
+        return _expand_blocks(components for _, _, components, _ in self._blocks)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("tag index out of range")
+        for offset, size, components, _ in self._blocks:
+            if index < offset + size:
+                interpreters, abis, platforms = components
+                interpreter, rest = divmod(index - offset, len(abis) * len(platforms))
+                abi, platform = divmod(rest, len(platforms))
+                return Tag(interpreters[interpreter], abis[abi], platforms[platform])
+
+    def __contains__(self, tag):
+        return self.rank(tag) is not None
+
+    def rank(self, tag):
+        """Return the rank of 'tag', or None if it is not supported."""
+        interpreter, abi, platform = tag._tags
+        for offset, _, components, positions in self._blocks:
+            interpreter_position = positions[0].get(interpreter)
+            if interpreter_position is None:
+                continue
+            abi_position = positions[1].get(abi)
+            if abi_position is None:
+                continue
+            platform_position = positions[2].get(platform)
+            if platform_position is None:
+                continue
+            abi_count, platform_count = len(components[1]), len(components[2])
+            return (
+                offset
+                + (interpreter_position * abi_count + abi_position) * platform_count
+                + platform_position
+            )
+        return None
+
+    def best_rank(self, tags):
+        """Return the best rank among 'tags', or None if none are supported.
+
+        The rank of a TagProduct is worked out from its components without
+        creating any tags.
+
+        """
+        if isinstance(tags, TagProduct):
+            return self._best_product_rank(tags)
+        best = None
+        for tag in tags:
+            rank = self.rank(tag)
+            if rank is not None and (best is None or rank < best):
+                best = rank
+        return best
+
+    def _best_product_rank(self, product):
+        # Every rank in a block is better than the ranks of the blocks after it,
+        # and within a block the rank grows with the position of each component.
+        for offset, _, components, positions in self._blocks:
+            best_positions = []
+            for values, value_positions in zip(
+                (product.interpreters, product.abis, product.platforms), positions
+            ):
+                found = values.intersection(value_positions)
+                if not found:
+                    break
+                best_positions.append(min(map(value_positions.__getitem__, found)))
+            else:
+                interpreter_position, abi_position, platform_position = best_positions
+                abi_count, platform_count = len(components[1]), len(components[2])
+                return (
+                    offset
+                    + (interpreter_position * abi_count + abi_position) * platform_count
+                    + platform_position
+                )
+        return None
+
+
+def sys_tag_space():
+    """Return the tags of sys_tags() as a TagSpace."""
+    return TagSpace(_tag_blocks(*_sys_details()))
+
+
+def target_tag_space(
+    implementation,
+    python_version,
+    abi=None,
+    platform="any",
+    arch=None,
+    libc_version=None,
+    macos_version=None,
+    interpreter=None,
+):
+    """Return the tags of target_tags() as a TagSpace."""
+    return TagSpace(
+        _tag_blocks(
+            *_target_details(
+                implementation,
+                python_version,
+                abi,
+                platform,
+                arch,
+                libc_version,
+                macos_version,
+                interpreter,
+            )
+        )
+    )
+
+
+# Bump whenever the format of the cache file written by cached_sys_tags() or
+# the tags sys_tags() calculates change.
+_SYS_TAGS_CACHE_VERSION = 2
+
+
+def _interpreter_fingerprint():
+    """Return what sys_tags() depends on for the running interpreter."""
+    try:
+        mtime = os.stat(sys.executable).st_mtime_ns
+    except OSError:
+        mtime = None
+    # The OS release decides e.g. the macOS platform tags; the kernel release
+    # changes with every macOS upgrade.
+    if hasattr(os, "uname"):
+        uname = os.uname()
+        system = [uname.sysname, uname.release, uname.machine]
+    else:
+        system = [
+            "Windows",
+            ".".join(map(str, sys.getwindowsversion()[:3])),
+            os.environ.get("PROCESSOR_ARCHITECTURE"),
+        ]
+    return {
+        "executable": sys.executable,
+        "mtime": mtime,
+        "version": sys.version,
+        "soabi": _get_config_var("SOABI"),
+        "libc": _glibc_version_string(),
+        "system": system,
+    }
+
+
+def cached_sys_tags(path):
+    """Return sys_tags() as a list, using 'path' as a cache file.
+
+    The cache is keyed on the interpreter's executable, its modification time,
+    sys.version, the SOABI, the libc version and the OS release and machine.
+    If any of those change or the cache file is unusable then the tags are
+    recalculated and the file is rewritten. Failing to write the cache file is
+    not an error.
+
+    """
+    import json
+
+    fingerprint = _interpreter_fingerprint()
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        if (
+            data["version"] == _SYS_TAGS_CACHE_VERSION
+            and data["fingerprint"] == fingerprint
+        ):
+            return [Tag.intern(*tag.split("-")) for tag in data["tags"]]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    tags = list(sys_tags())
+    data = {
+        "version": _SYS_TAGS_CACHE_VERSION,
+        "fingerprint": fingerprint,
+        "tags": [str(tag) for tag in tags],
+    }
+    try:
+        _write_atomically(path, json.dumps(data))
+    except OSError:
+        pass
+    return tags
+
+
+def _write_atomically(path, data):
+    """Write 'data' to 'path' so readers never see a partially written file.
+
+    'data' is either text, which is encoded as UTF-8, or bytes.
+
+    """
+    import tempfile
+
+    directory = os.path.dirname(os.path.abspath(path))
+    if isinstance(data, bytes):
+        file = tempfile.NamedTemporaryFile("wb", dir=directory, delete=False)
+    else:
+        file = tempfile.NamedTemporaryFile(
+            "w", encoding="utf-8", dir=directory, delete=False
+        )
+    try:
+        with file:
+            file.write(data)
+        os.replace(file.name, path)
+    except BaseException:
+        os.unlink(file.name)
+        raise
+
+
+class TagPriorityIndex:
+
+    """Mapping of tag triples to their priority for a sequence of tags.
+
+    The rank of a tag is its position in the sequence the index was built from,
+    with 0 being the most preferred. If a tag appears multiple times then its
+    earliest position is used.
+
+    """
+
+    def __init__(self, tags=None):
+        """Build the index from 'tags', defaulting to sys_tags()."""
+        if tags is None:
+            tags = sys_tags()
+        ranks = {}
+        for rank, tag in enumerate(tags):
+            ranks.setdefault(tag, rank)
+        self._ranks = ranks
+
+    def __len__(self):
+        return len(self._ranks)
+
+    def __contains__(self, tag):
+        return tag in self._ranks
+
+    def __iter__(self):
+        return iter(self._ranks)
+
+    def rank(self, tag):
+        """Return the rank of 'tag', or None if it is not supported."""
+        return self._ranks.get(tag)
+
+    def best_rank(self, tags):
+        """Return the best rank among 'tags', or None if none are supported.
+
+        'tags' is typically the result of parse_tag() or parse_wheel_tag().
+
+        """
+        ranks = self._ranks
+        best = None
+        for tag in tags:
+            rank = ranks.get(tag)
+            if rank is not None and (best is None or rank < best):
+                best = rank
+        return best
+
+
+def _priority_index(tags):
+    """Return an object with a rank() and best_rank() method for 'tags'."""
+    if tags is None or not hasattr(tags, "best_rank"):
+        return TagPriorityIndex(tags)
+    return tags
+
+
+_PROJECT_NAME_SEPARATORS = re.compile(r"[-_.]+")
+
+
+def _project_name(path):
+    """Return the normalized project name from the path of a wheel file."""
+    filename = os.path.basename(os.fspath(path))
+    name = filename.partition("-")[0]
+    return _PROJECT_NAME_SEPARATORS.sub("-", name).lower()
+
+
+class _WheelSelector:
+
+    """Rank wheel files against a priority index and track the best per project.
+
+    Each distinct tag string is only parsed and ranked once, and only the
+    current best file per project is kept.
+
+    """
+
+    def __init__(self, index):
+        self._index = index
+        self._ranks = {}
+        # Normalized project name -> (rank, filename).
+        self.best = {}
+
+    def check(self, filename):
+        """Return the (status, rank) of a wheel file.
+
+        The status is "compatible", "incompatible" or "invalid" for file names
+        which are not wheel file names, e.g. sdists or ".whl.metadata" files; the
+        rank is None unless compatible.
+
+        """
+        try:
+            tag_string = "-".join(_split_wheel_filename(filename)[1][-3:])
+            try:
+                rank = self._ranks[tag_string]
+            except KeyError:
+                rank = self._index.best_rank(parse_tag(tag_string))
+                self._ranks[tag_string] = rank
+        except ValueError:
+            return "invalid", None
+        return ("incompatible" if rank is None else "compatible"), rank
+
+    def update(self, filename, rank):
+        """Record a compatible wheel file.
+
+        The project name is returned if the file is now the best one for its
+        project, otherwise None. When files share the best rank, the first one
+        is kept.
+
+        """
+        project = _project_name(filename)
+        current = self.best.get(project)
+        if current is None or rank < current[0]:
+            self.best[project] = rank, filename
+            return project
+        return None
+
+
+def rank_wheels(filenames, tags=None):
+    """Yield (filename, rank) pairs for the wheel files in 'filenames'.
+
+    The rank is the best priority of the wheel's tags within 'tags' (sys_tags()
+    by default), or None if the wheel is incompatible or the file name is not a
+    valid wheel file name. 'tags' may also be a TagPriorityIndex to avoid
+    rebuilding it. Each distinct tag string is only parsed and ranked once.
+
+    """
+    selector = _WheelSelector(_priority_index(tags))
+    for filename in filenames:
+        yield filename, selector.check(filename)[1]
+
+
+def select_best(filenames, tags=None, on_reject=None):
+    """Select the best compatible wheel file per project from 'filenames'.
+
+    A tuple of a dict mapping normalized project names to the best wheel file
+    and the number of rejected files is returned. If given, 'on_reject' is
+    called with each rejected file and the reason, "incompatible" or "invalid"
+    for file names which are not wheel file names (e.g. sdists).
+
+    'filenames' is consumed in a single pass and only the current best file
+    per project is kept, so memory use does not grow with the number of files.
+    When multiple files share the best rank, the first one is kept.
+
+    """
+    selector = _WheelSelector(_priority_index(tags))
+    rejected = 0
+    for filename in filenames:
+        status, rank = selector.check(filename)
+        if rank is None:
+            rejected += 1
+            if on_reject is not None:
+                on_reject(filename, status)
+        else:
+            selector.update(filename, rank)
+    best = {project: filename for project, (_, filename) in selector.best.items()}
+    return best, rejected
+
+
+class TagVocabulary:
+
+    """Encoding of tag triples as integers.
+
+    Every distinct interpreter, ABI and platform string is assigned a small
+    integer and a tag triple is encoded as a single integer key which fits in
+    an unsigned 64-bit integer.
+
+    """
+
+    _BITS = 21
+    _MASK = (1 << _BITS) - 1
+
+    def __init__(self):
+        self._ids = {}
+        self._strings = []
+
+    def __len__(self):
+        return len(self._strings)
+
+    def component_id(self, string, add=True):
+        """Return the integer for the component 'string'.
+
+        If 'add' is false then None is returned for unknown components.
+
+        """
+        try:
+            return self._ids[string]
+        except KeyError:
+            if not add:
+                return None
+        if len(self._strings) > self._MASK:
+            raise ValueError("too many distinct tag components")
+        id_ = self._ids[string] = len(self._strings)
+        self._strings.append(string)
+        return id_
+
+    def component(self, id_):
+        """Return the component string for the integer 'id_'."""
+        return self._strings[id_]
+
+    def encode(self, tag, add=True):
+        """Return the integer key for 'tag'.
+
+        If 'add' is false then None is returned for tags with unknown
+        components.
+
+        """
+        key = 0
+        for component in tag._tags:
+            id_ = self.component_id(component, add)
+            if id_ is None:
+                return None
+            key = (key << self._BITS) | id_
+        return key
+
+    def encode_ranks(self, tags=None):
+        """Return a dict mapping the keys of 'tags' to their rank.
+
+        'tags' defaults to sys_tags(). The result is used for ranking
+        CompactTagSet and CompactTagIndex entries.
+
+        """
+        if tags is None:
+            tags = sys_tags()
+        ranks = {}
+        for rank, tag in enumerate(tags):
+            ranks.setdefault(self.encode(tag), rank)
+        return ranks
+
+    def decode(self, key):
+        """Return the Tag for the integer 'key'."""
+        bits, mask, strings = self._BITS, self._MASK, self._strings
+        return Tag.intern(
+            strings[key >> (2 * bits)],
+            strings[(key >> bits) & mask],
+            strings[key & mask],
+        )
+
+
+def _numpy():
+    """Return the numpy module, or None if it is not installed."""
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+
+def compatibility_matrix(filenames, targets, backend=None):
+    """Calculate the best rank of every wheel file for every target.
+
+    'targets' is a sequence of tag sequences, e.g. from sys_tags() or
+    target_tags(). The result has a row per wheel file in 'filenames' and a
+    column per target holding the best rank of the wheel's tags in the target,
+    or -1 if the wheel is incompatible with the target. Rows of file names which
+    are not valid wheel file names, e.g. sdists, are all -1.
+
+    With the "numpy" backend the result is a 2-dimensional NumPy array and with
+    the "python" backend it is a list of lists. The default is to use NumPy if
+    it is installed.
+
+    """
+    if backend is None:
+        backend = "numpy" if _numpy() is not None else "python"
+    if backend not in ("numpy", "python"):
+        raise ValueError("unknown backend {!r}".format(backend))
+    if backend == "numpy" and _numpy() is None:
+        raise ImportError("the numpy backend requires NumPy to be installed")
+    targets = list(targets)
+
+    # Every tag supported by any target gets a row of its rank per target.
+    vocabulary = TagVocabulary()
+    key_indexes = {}
+    key_ranks = []
+    key_masks = []
+    missing = sys.maxsize
+    for column, tags in enumerate(targets):
+        for rank, tag in enumerate(tags):
+            key = vocabulary.encode(tag)
+            index = key_indexes.get(key)
+            if index is None:
+                index = key_indexes[key] = len(key_ranks)
+                key_ranks.append({})
+                key_masks.append(0)
+            key_ranks[index].setdefault(column, rank)
+            key_masks[index] |= 1 << column
+    columns = len(targets)
+    table = []
+    for ranks in key_ranks:
+        row = [missing] * columns
+        for column, rank in ranks.items():
+            row[column] = rank
+        table.append(row)
+
+    # Each distinct tag string is only parsed and encoded once.
+    tag_strings = {}
+    tag_string_keys = []
+    rows = []
+    for filename in filenames:
+        try:
+            tag_string = "-".join(_split_wheel_filename(filename)[1][-3:])
+        except ValueError:
+            # Like select_best(), treat invalid file names as incompatible.
+            tag_string = None
+        try:
+            row = tag_strings[tag_string]
+        except KeyError:
+            indexes = []
+            tags = () if tag_string is None else parse_tag(tag_string)
+            for tag in tags:
+                key = vocabulary.encode(tag, add=False)
+                index = key_indexes.get(key)
+                if index is not None:
+                    indexes.append(index)
+            row = tag_strings[tag_string] = len(tag_string_keys)
+            tag_string_keys.append(indexes)
+        rows.append(row)
+
+    if backend == "numpy":
+        return _numpy_matrix(table, tag_string_keys, rows, columns, missing)
+    else:
+        return _python_matrix(
+            table, key_masks, tag_string_keys, rows, columns, missing
+        )
+
+
+def _python_matrix(table, key_masks, tag_string_keys, rows, columns, missing):
+    """Calculate the compatibility matrix in pure Python.
+
+    A bitset of the targets supporting each tag short-circuits the common case
+    of a wheel being incompatible with every target.
+
+    """
+    incompatible = [-1] * columns
+    tag_string_rows = []
+    for indexes in tag_string_keys:
+        mask = 0
+        for index in indexes:
+            mask |= key_masks[index]
+        if not mask:
+            tag_string_rows.append(incompatible)
+            continue
+        if len(indexes) == 1:
+            best = table[indexes[0]]
+        else:
+            best = map(min, *(table[index] for index in indexes))
+        tag_string_rows.append([-1 if rank == missing else rank for rank in best])
+    return [list(tag_string_rows[row]) for row in rows]
+
+
+def _numpy_matrix(table, tag_string_keys, rows, columns, missing):
+    """Calculate the compatibility matrix with NumPy."""
+    numpy = _numpy()
+    if not columns:
+        return numpy.empty((len(rows), 0), dtype=numpy.int64)
+    # An extra row of missing ranks stands in for tag strings without any
+    # supported tags.
+    table = numpy.array(table + [[missing] * columns], dtype=numpy.int64).reshape(
+        -1, columns
+    )
+    none_index = len(table) - 1
+    flat_indexes = []
+    offsets = []
+    for indexes in tag_string_keys:
+        offsets.append(len(flat_indexes))
+        flat_indexes.extend(indexes or [none_index])
+    if offsets:
+        best = numpy.minimum.reduceat(
+            table[numpy.array(flat_indexes, dtype=numpy.intp)],
+            numpy.array(offsets, dtype=numpy.intp),
+            axis=0,
+        )
+    else:
+        best = numpy.empty((0, columns), dtype=numpy.int64)
+    best[best == missing] = -1
+    return best[numpy.array(rows, dtype=numpy.intp)].reshape(-1, columns)
+
+
+class CompactTagSet:
+
+    """Immutable set of tags stored as sorted integer keys of a TagVocabulary."""
+
+    __slots__ = ["vocabulary", "_keys"]
+
+    def __init__(self, vocabulary, tags=()):
+        self.vocabulary = vocabulary
+        self._keys = array.array("Q", sorted({vocabulary.encode(tag) for tag in tags}))
+
+    @classmethod
+    def _from_keys(cls, vocabulary, keys):
+        """Create an instance from an array of sorted, unique keys."""
+        self = cls.__new__(cls)
+        self.vocabulary = vocabulary
+        self._keys = keys
+        return self
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __iter__(self):
+        decode = self.vocabulary.decode
+        return (decode(key) for key in self._keys)
+
+    def __contains__(self, tag):
+        key = self.vocabulary.encode(tag, add=False)
+        return key is not None and self._has_key(key)
+
+    def _has_key(self, key):
+        keys = self._keys
+        index = bisect.bisect_left(keys, key)
+        return index < len(keys) and keys[index] == key
+
+    def __eq__(self, other):
+        if isinstance(other, CompactTagSet) and other.vocabulary is self.vocabulary:
+            return self._keys == other._keys
+        elif isinstance(other, (set, frozenset, CompactTagSet)):
+            return frozenset(self) == frozenset(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return "<CompactTagSet {tags}>".format(
+            tags=sorted(str(tag) for tag in self)
+        )
+
+    def intersection(self, other):
+        """Return the tags in both this set and 'other' as a CompactTagSet."""
+        if isinstance(other, CompactTagSet) and other.vocabulary is self.vocabulary:
+            keys = array.array("Q", sorted(set(self._keys).intersection(other._keys)))
+        else:
+            encode = self.vocabulary.encode
+            found = set()
+            for tag in other:
+                key = encode(tag, add=False)
+                if key is not None and self._has_key(key):
+                    found.add(key)
+            keys = array.array("Q", sorted(found))
+        return self._from_keys(self.vocabulary, keys)
+
+    def best_rank(self, ranks):
+        """Return the best rank from 'ranks', or None if no tags are supported.
+
+        'ranks' is the result of TagVocabulary.encode_ranks() for the same
+        vocabulary.
+
+        """
+        best = None
+        for key in self._keys:
+            rank = ranks.get(key)
+            if rank is not None and (best is None or rank < best):
+                best = rank
+        return best
+
+
+class CompactTagIndex:
+
+    """Packed storage for the tag sets of many wheels.
+
+    The keys of all tag sets are stored in a single array with a second array
+    recording where each tag set starts, so a tag set costs a few bytes per tag
+    instead of a frozenset.
+
+    """
+
+    def __init__(self, vocabulary=None):
+        self.vocabulary = TagVocabulary() if vocabulary is None else vocabulary
+        self._keys = array.array("Q")
+        self._offsets = array.array("I", [0])
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def add(self, tags):
+        """Add a tag set, e.g. from parse_wheel_tag(), and return its index."""
+        encode = self.vocabulary.encode
+        self._keys.extend(sorted({encode(tag) for tag in tags}))
+        self._offsets.append(len(self._keys))
+        return len(self._offsets) - 2
+
+    def _bounds(self, index):
+        """Return the start and stop of the keys of the tag set at 'index'."""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("tag set index out of range")
+        return self._offsets[index], self._offsets[index + 1]
+
+    def __getitem__(self, index):
+        """Return the tag set at 'index' as a CompactTagSet."""
+        start, stop = self._bounds(index)
+        return CompactTagSet._from_keys(self.vocabulary, self._keys[start:stop])
+
+    def best_rank(self, index, ranks):
+        """Return the best rank of the tag set at 'index' without copying it.
+
+        'ranks' is the result of TagVocabulary.encode_ranks() for the same
+        vocabulary.
+
+        """
+        keys = self._keys
+        best = None
+        for position in range(*self._bounds(index)):
+            rank = ranks.get(keys[position])
+            if rank is not None and (best is None or rank < best):
+                best = rank
+        return best
+
+
+class IndexEntry(
+    collections.namedtuple(
+        "IndexEntry", ["filename", "url", "hashes", "requires_python", "yanked"]
+    )
+):
+
+    """A wheel file listed on a PEP 503/691 simple index page.
+
+    Instances are path-like, so they can be passed directly to functions such
+    as select_best() which accept wheel file paths.
+
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, filename, url, hashes=None, requires_python=None, yanked=False):
+        if hashes is None:
+            hashes = {}
+        return super().__new__(cls, filename, url, hashes, requires_python, yanked)
+
+    def __fspath__(self):
+        return self.filename
+
+
+_JSON_CONTENT_TYPES = {"json", "application/vnd.pypi.simple.v1+json"}
+
+
+def iter_simple_index(file, content_type=None, chunk_size=64 * 1024):
+    """Yield an IndexEntry for every wheel file on a simple index page.
+
+    'file' is a file object in binary or text mode for either the HTML (PEP 503)
+    or JSON (PEP 691) format of a project page; 'content_type' can be given as
+    "html" or "json" (or the equivalent MIME types) and otherwise the format is
+    detected from the content. The page is read 'chunk_size' at a time and
+    entries are yielded as soon as they are complete, so the whole page is never
+    held in memory.
+
+    """
+    chunks = _read_text_chunks(file, chunk_size)
+    first = ""
+    for first in chunks:
+        if first.strip():
+            break
+    if content_type is None:
+        is_json = first.lstrip().startswith("{")
+    else:
+        mime_type = content_type.partition(";")[0].strip().lower()
+        is_json = mime_type in _JSON_CONTENT_TYPES
+    chunks = _prepend(first, chunks)
+    if is_json:
+        return _iter_json_entries(chunks)
+    else:
+        return _iter_html_entries(chunks)
+
+
+def _prepend(first, chunks):
+    yield first
+    for chunk in chunks:
+        yield chunk
+
+
+def _read_text_chunks(file, chunk_size):
+    """Yield the contents of 'file' as text in chunks."""
+    import codecs
+
+    decoder = None
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            break
+        if not isinstance(chunk, str):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder("utf-8-sig")()
+            chunk = decoder.decode(chunk)
+        yield chunk
+    if decoder is not None:
+        yield decoder.decode(b"", final=True)
+
+
+def _iter_html_entries(chunks):
+    from html.parser import HTMLParser
+
+    entries = []
+    anchor = []  # The attributes and text of the currently open anchor.
+
+    def handle_starttag(tag, attrs):
+        if tag == "a":
+            anchor[:] = [dict(attrs), []]
+
+    def handle_data(data):
+        if anchor:
+            anchor[1].append(data)
+
+    def handle_endtag(tag):
+        if tag == "a" and anchor:
+            attrs, text = anchor
+            del anchor[:]
+            entry = _html_entry(attrs, "".join(text).strip())
+            if entry is not None:
+                entries.append(entry)
+
+    parser = HTMLParser()
+    parser.handle_starttag = handle_starttag
+    parser.handle_data = handle_data
+    parser.handle_endtag = handle_endtag
+    for chunk in chunks:
+        parser.feed(chunk)
+        for entry in entries:
+            yield entry
+        del entries[:]
+    parser.close()
+    for entry in entries:
+        yield entry
+
+
+def _html_entry(attrs, text):
+    """Create an IndexEntry from an anchor, or None if it is not for a wheel."""
+    import urllib.parse
+
+    url = attrs.get("href")
+    if not url:
+        return None
+    url, _, fragment = url.partition("#")
+    if not text:
+        path = urllib.parse.urlsplit(url).path
+        text = urllib.parse.unquote(path).rpartition("/")[2]
+    filename = text
+    if not filename.endswith(".whl"):
+        return None
+    hashes = {}
+    if fragment:
+        name, _, value = fragment.partition("=")
+        if value:
+            hashes[name] = value
+    yanked = attrs.get("data-yanked", False)
+    if yanked is None or yanked == "":
+        yanked = True
+    return IndexEntry(filename, url, hashes, attrs.get("data-requires-python"), yanked)
+
+
+def _iter_json_entries(chunks):
+    import json
+
+    decoder = json.JSONDecoder()
+    files_start = re.compile(r'"files"\s*:\s*\[')
+    whitespace = re.compile(r"[\s,]*")
+    buffer = ""
+    position = None
+    for chunk in chunks:
+        buffer += chunk
+        if position is None:
+            match = files_start.search(buffer)
+            if match is None:
+                # Keep enough to match the start of the list across chunks.
+                buffer = buffer[-64:]
+                continue
+            position = match.end()
+        while True:
+            position = whitespace.match(buffer, position).end()
+            if position == len(buffer):
+                break
+            elif buffer[position] == "]":
+                return
+            try:
+                details, position = decoder.raw_decode(buffer, position)
+            except ValueError:
+                # The object is incomplete; wait for more data.
+                break
+            entry = _json_entry(details)
+            if entry is not None:
+                yield entry
+        buffer = buffer[position:]
+        position = 0
+    if position is not None:
+        raise ValueError("incomplete 'files' list in the JSON simple index page")
+
+
+def _json_entry(details):
+    """Create an IndexEntry from a file's details, or None if it is not a wheel."""
+    filename = details["filename"]
+    if not filename.endswith(".whl"):
+        return None
+    return IndexEntry(
+        filename,
+        details["url"],
+        dict(details.get("hashes", {})),
+        details.get("requires-python"),
+        details.get("yanked", False),
+    )
+
+
+def _version_tuple(string):
+    """Convert a version string such as "3.7" to a tuple of integers."""
+    import argparse
+
+    try:
+        return tuple(int(part) for part in string.split("."))
+    except ValueError:
+        raise argparse.ArgumentTypeError("invalid version: {!r}".format(string))
+
+
+def _argument_parser():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="python -m pep425",
+        description="Print the supported tags or check wheel files against them.",
+    )
+    target = parser.add_argument_group(
+        "target", "Describe a target interpreter instead of using the running one."
+    )
+    target.add_argument("--implementation", help='e.g. "cp" or "cpython"')
+    target.add_argument("--python-version", type=_version_tuple, help='e.g. "3.7"')
+    target.add_argument("--abi")
+    target.add_argument("--interpreter", help="interpreter tag, e.g. pp360")
+    target.add_argument(
+        "--platform", help='"linux", "macos", "windows" or a tag (default "any")'
+    )
+    target.add_argument("--arch")
+    target.add_argument("--libc-version", type=_version_tuple, help='e.g. "2.17"')
+    target.add_argument("--macos-version", type=_version_tuple, help='e.g. "10.14"')
+    batch = parser.add_argument_group("batch mode")
+    batch.add_argument(
+        "--batch",
+        metavar="FILE",
+        help='check the wheel file names in FILE ("-" for stdin), one per line',
+    )
+    batch.add_argument(
+        "--best", action="store_true", help="only report the best wheel per project"
+    )
+    batch.add_argument("--format", choices=["tsv", "jsonl"], default="tsv")
+    batch.add_argument(
+        "--stats", action="store_true", help="report throughput on stderr"
+    )
+    return parser
+
+
+def _cli_tags(args, parser):
+    """Return the tags requested by the command-line arguments."""
+    if args.implementation is None:
+        options = [
+            "--" + name.replace("_", "-")
+            for name in (
+                "python_version",
+                "abi",
+                "interpreter",
+                "platform",
+                "arch",
+                "libc_version",
+                "macos_version",
+            )
+            if getattr(args, name) is not None
+        ]
+        if options:
+            parser.error(
+                "--implementation is required with {}".format(", ".join(options))
+            )
+        return sys_tags()
+    if args.python_version is None:
+        parser.error("--python-version is required with --implementation")
+    try:
+        return target_tags(
+            args.implementation,
+            args.python_version,
+            abi=args.abi,
+            platform="any" if args.platform is None else args.platform,
+            arch=args.arch,
+            libc_version=args.libc_version,
+            macos_version=args.macos_version,
+            interpreter=args.interpreter,
+        )
+    except ValueError as exc:
+        parser.error(str(exc))
+
+
+def _batch(lines, index, best_only, write_record):
+    """Check the wheel file names in 'lines', returning how many were read."""
+    selector = _WheelSelector(index)
+    count = 0
+    for count, line in enumerate(lines, 1):
+        filename = line.strip()
+        if not filename:
+            continue
+        status, rank = selector.check(filename)
+        if not best_only:
+            write_record(filename, status, rank)
+        elif rank is not None:
+            selector.update(filename, rank)
+    for rank, filename in selector.best.values():
+        write_record(filename, "best", rank)
+    return count
+
+
+def main(args=None):
+    """Run the command-line interface."""
+    try:
+        return _main(args)
+    except BrokenPipeError:
+        # The reader went away, e.g. "python -m pep425 | head -1". Point
+        # stdout at devnull so that flushing it at exit cannot fail again.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        os.close(devnull)
+        return 0
+
+
+def _main(args):
+    import time
+
+    parser = _argument_parser()
+    args = parser.parse_args(args)
+    tags = _cli_tags(args, parser)
+    out = sys.stdout
+    if args.batch is None:
+        out.writelines("{}\n".format(tag) for tag in tags)
+        return 0
+
+    index = TagPriorityIndex(tags)
+    if args.format == "jsonl":
+        import json
+
+        def write_record(filename, status, rank):
+            record = {"filename": filename, "status": status, "rank": rank}
+            out.write(json.dumps(record) + "\n")
+
+    else:
+
+        def write_record(filename, status, rank):
+            out.write(
+                "{}\t{}\t{}\n".format(filename, status, "" if rank is None else rank)
+            )
+
+    start = time.perf_counter()
+    if args.batch == "-":
+        count = _batch(sys.stdin, index, args.best, write_record)
+    else:
+        with open(args.batch, "r", encoding="utf-8", buffering=1024 * 1024) as file:
+            count = _batch(file, index, args.best, write_record)
+    out.flush()
+    if args.stats:
+        elapsed = time.perf_counter() - start
+        rate = count / elapsed if elapsed else float("inf")
+        sys.stderr.write(
+            "{count} lines in {elapsed:.3f}s ({rate:.0f} lines/sec)\n".format(
+                count=count, elapsed=elapsed, rate=rate
+            )
+        )
+    return 0
+
+
+WheelhouseEntry = collections.namedtuple(
+    "WheelhouseEntry", ["path", "mtime", "size", "tags"]
+)
+WheelhouseEntry.__doc__ = """A wheel file found by scan_wheelhouse().
+
+'path' is relative to the scanned directory, 'mtime' is in nanoseconds and
+'tags' is the frozenset of the wheel's tags (empty for invalid file names).
+
+"""
+
+
+# Bump whenever the format of the index file written by scan_wheelhouse()
+# changes.
+_WHEELHOUSE_INDEX_VERSION = 1
+
+
+def _walk_wheels(root, prefix="", visited=None):
+    """Yield the relative path, mtime and size of the wheel files under 'root'.
+
+    Symbolic links to directories are followed, but every directory is only
+    walked once, so links back up the tree do not recurse forever.
+
+    """
+    if visited is None:
+        stat = os.stat(root)
+        visited = {(stat.st_dev, stat.st_ino)}
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                # DirEntry.stat() lacks the device and inode on Windows.
+                stat = os.stat(entry.path)
+                key = stat.st_dev, stat.st_ino
+                if key in visited:
+                    continue
+                visited.add(key)
+                for found in _walk_wheels(
+                    entry.path, prefix + entry.name + os.sep, visited
+                ):
+                    yield found
+            elif entry.name.endswith(".whl") and entry.is_file():
+                stat = entry.stat()
+                yield prefix + entry.name, stat.st_mtime_ns, stat.st_size
+
+
+def _parse_wheel_chunk(paths):
+    """Return the tag triples of each wheel file as tuples of strings.
+
+    Invalid file names get no tags. The result is cheap to send between
+    processes.
+
+    """
+    parsed = []
+    for path in paths:
+        try:
+            tags = parse_wheel_tag(path)
+        except ValueError:
+            tags = ()
+        parsed.append([tag._tags for tag in tags])
+    return parsed
+
+
+def _load_wheelhouse_index(index_path):
+    """Return the entries of a wheelhouse index file, or {} if it is unusable."""
+    import json
+
+    try:
+        with open(index_path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        if data["version"] != _WHEELHOUSE_INDEX_VERSION:
+            return {}
+        return {
+            path: WheelhouseEntry(
+                path,
+                mtime,
+                size,
+                frozenset(Tag.intern(*tag.split("-")) for tag in tags),
+            )
+            for path, (mtime, size, tags) in data["entries"].items()
+        }
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def _save_wheelhouse_index(index_path, entries):
+    import json
+
+    data = {
+        "version": _WHEELHOUSE_INDEX_VERSION,
+        "entries": {
+            entry.path: [entry.mtime, entry.size, sorted(map(str, entry.tags))]
+            for entry in entries.values()
+        },
+    }
+    _write_atomically(index_path, json.dumps(data))
+
+
+def scan_wheelhouse(root, index_path=None, processes=None, chunk_size=1000):
+    """Find and parse all wheel files in the directory tree of 'root'.
+
+    A dict mapping each wheel file's path relative to 'root' to its
+    WheelhouseEntry is returned.
+
+    If 'index_path' is given, the results are saved to that file and files whose
+    mtime and size still match the saved index are not parsed again on later
+    scans. New and changed files are parsed in chunks of 'chunk_size' across
+    'processes' worker processes (defaulting to the number of CPUs); with
+    'processes' set to 0 or with a single chunk, parsing happens in the
+    current process.
+
+    """
+    previous = {} if index_path is None else _load_wheelhouse_index(index_path)
+    entries = {}
+    stale = []
+    for path, mtime, size in _walk_wheels(root):
+        entry = previous.get(path)
+        if entry is not None and entry.mtime == mtime and entry.size == size:
+            entries[path] = entry
+        else:
+            stale.append((path, mtime, size))
+
+    chunks = [
+        [path for path, _, _ in stale[start : start + chunk_size]]
+        for start in range(0, len(stale), chunk_size)
+    ]
+    if processes is None:
+        processes = os.cpu_count() or 1
+    if processes and len(chunks) > 1:
+        import concurrent.futures
+
+        with concurrent.futures.ProcessPoolExecutor(processes) as executor:
+            results = list(executor.map(_parse_wheel_chunk, chunks))
+    else:
+        results = [_parse_wheel_chunk(chunk) for chunk in chunks]
+
+    parsed = (triples for result in results for triples in result)
+    for (path, mtime, size), triples in zip(stale, parsed):
+        tags = frozenset(Tag.intern(*triple) for triple in triples)
+        entries[path] = WheelhouseEntry(path, mtime, size, tags)
+
+    if index_path is not None and (stale or len(entries) != len(previous)):
+        _save_wheelhouse_index(index_path, entries)
+    return entries
+
+
+_WHEEL_INDEX_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id INTEGER PRIMARY KEY,
+    project TEXT NOT NULL,
+    filename TEXT NOT NULL UNIQUE
+);
+CREATE INDEX IF NOT EXISTS files_project ON files (project);
+CREATE TABLE IF NOT EXISTS tags (
+    file_id INTEGER NOT NULL REFERENCES files (id) ON DELETE CASCADE,
+    interpreter TEXT NOT NULL,
+    abi TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    PRIMARY KEY (file_id, interpreter, abi, platform)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tags_triple ON tags (interpreter, abi, platform);
+CREATE TEMP TABLE IF NOT EXISTS tag_ranks (
+    interpreter TEXT NOT NULL,
+    abi TEXT NOT NULL,
+    platform TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    PRIMARY KEY (interpreter, abi, platform)
+) WITHOUT ROWID;
+"""
+
+_WHEEL_INDEX_RANKED_QUERY = """
+SELECT files.filename, MIN(tag_ranks.rank) AS best_rank
+FROM files
+JOIN tags ON tags.file_id = files.id
+JOIN tag_ranks USING (interpreter, abi, platform)
+WHERE files.project = ?
+GROUP BY files.id
+ORDER BY best_rank, files.filename
+"""
+
+
+class WheelIndex:
+
+    """Persistent index of wheel files and their tags stored in SQLite.
+
+    Files are ranked for a tag sequence (sys_tags() by default) which is loaded
+    into a temporary table once per connection, so finding the best file for a
+    project is a single indexed query.
+
+    """
+
+    def __init__(self, path=":memory:"):
+        import sqlite3
+
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.executescript(_WHEEL_INDEX_SCHEMA)
+        self._has_ranks = False
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._connection.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def __contains__(self, filename):
+        filename = os.path.basename(os.fspath(filename))
+        cursor = self._connection.execute(
+            "SELECT 1 FROM files WHERE filename = ?", (filename,)
+        )
+        return cursor.fetchone() is not None
+
+    def add(self, filenames):
+        """Add the wheel files in 'filenames', skipping those already indexed.
+
+        ValueError is raised for invalid wheel file names, in which case none of
+        the files are added.
+
+        """
+        with self._connection as connection:
+            for filename in filenames:
+                filename = os.path.basename(os.fspath(filename))
+                tags = parse_wheel_tag(filename)
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO files (project, filename) VALUES (?, ?)",
+                    (_project_name(filename), filename),
+                )
+                if not cursor.rowcount:
+                    continue
+                file_id = cursor.lastrowid
+                connection.executemany(
+                    "INSERT INTO tags VALUES (?, ?, ?, ?)",
+                    ((file_id,) + tag._tags for tag in tags),
+                )
+
+    def remove(self, filename):
+        """Remove a wheel file from the index."""
+        filename = os.path.basename(os.fspath(filename))
+        with self._connection as connection:
+            connection.execute("DELETE FROM files WHERE filename = ?", (filename,))
+
+    def set_tags(self, tags=None):
+        """Rank files by their priority in 'tags' (sys_tags() by default)."""
+        if tags is None:
+            tags = sys_tags()
+        with self._connection as connection:
+            connection.execute("DELETE FROM tag_ranks")
+            connection.executemany(
+                "INSERT OR IGNORE INTO tag_ranks VALUES (?, ?, ?, ?)",
+                (tag._tags + (rank,) for rank, tag in enumerate(tags)),
+            )
+        self._has_ranks = True
+
+    def ranked(self, project):
+        """Return the compatible files of 'project' as (filename, rank) pairs.
+
+        The pairs are in priority order, with ties broken by file name.
+
+        """
+        if not self._has_ranks:
+            self.set_tags()
+        cursor = self._connection.execute(
+            _WHEEL_INDEX_RANKED_QUERY, (_project_name(project),)
+        )
+        return cursor.fetchall()
+
+    def best(self, project):
+        """Return the file name of the best compatible wheel for 'project'.
+
+        None is returned if there are no compatible files.
+
+        """
+        if not self._has_ranks:
+            self.set_tags()
+        row = self._connection.execute(
+            _WHEEL_INDEX_RANKED_QUERY + "LIMIT 1", (_project_name(project),)
+        ).fetchone()
+        return None if row is None else row[0]
+
+
+# The private functions which Instrumentation records.
+_INSTRUMENTED_FUNCTIONS = [
+    "_get_config_var",
+    "_get_platform",
+    "_mac_ver",
+    "_glibc_version_string_confstr",
+    "_glibc_version_string_ctypes",
+    "_glibc_version_string",
+    "_glibc_version",
+    "_interpreter_name",
+    "_cpython_abi",
+    "_generic_abi",
+    "_pypy_interpreter",
+    "_generic_interpreter",
+    "_mac_platforms",
+    "_linux_platforms",
+    "_windows_platforms",
+    "_generic_platforms",
+    "_is_manylinux_compatible",
+    "_have_compatible_glibc",
+    "_cpython_tags",
+    "_pypy_tags",
+    "_generic_tags",
+    "_independent_tags",
+]
+
+
+class Instrumentation:
+
+    """Context manager recording the calls to platform detection and tag generation.
+
+    On entry the private detection and tag generation functions of this module
+    are replaced with wrappers that record their call count and the total time
+    spent in them, and on exit the original functions are restored. Nothing is
+    recorded nor slowed down outside of the context. The stats are a dict
+    mapping function names to dicts with "calls" and "seconds" keys; the time of
+    a function includes that of the functions it calls, and for generators only
+    the time spent producing values is included. If given, 'callback' is also
+    called with the function name and the seconds taken for every call.
+
+    The functions are replaced for all threads, so only one thread should
+    instrument at a time.
+
+    """
+
+    def __init__(self, callback=None):
+        self.stats = {}
+        self._callback = callback
+        self._originals = {}
+
+    def __enter__(self):
+        namespace = globals()
+        for name in _INSTRUMENTED_FUNCTIONS:
+            original = namespace[name]
+            self._originals[name] = original
+            namespace[name] = self._wrap(name, original)
+        return self.stats
+
+    def __exit__(self, *exc_info):
+        globals().update(self._originals)
+        self._originals.clear()
+
+    def _record(self, name, seconds):
+        stats = self.stats.setdefault(name, {"calls": 0, "seconds": 0.0})
+        stats["calls"] += 1
+        stats["seconds"] += seconds
+        if self._callback is not None:
+            self._callback(name, seconds)
+
+    def _wrap(self, name, function):
+        import functools
+        import inspect
+        import time
+
+        record = self._record
+        if inspect.isgeneratorfunction(function):
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                generator = function(*args, **kwargs)
+                seconds = 0.0
+                try:
+                    while True:
+                        start = time.perf_counter()
+                        try:
+                            value = next(generator)
+                        except StopIteration:
+                            seconds += time.perf_counter() - start
+                            return
+                        seconds += time.perf_counter() - start
+                        yield value
+                finally:
+                    record(name, seconds)
+
+        else:
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    record(name, time.perf_counter() - start)
+
+        return wrapper
+
+
+# The tags from async_sys_tags() once calculated, and the pending calculations
+# per event loop before that.
+_async_sys_tags_result = []
+_async_sys_tags_pending = {}
+
+
+async def async_sys_tags():
+    """Return sys_tags() as a tuple without blocking the event loop.
+
+    The platform detection runs in the event loop's default executor. It only
+    happens once per process; concurrent and later calls share the result.
+
+    """
+    import asyncio
+
+    if _async_sys_tags_result:
+        return _async_sys_tags_result[0]
+    loop = asyncio.get_running_loop()
+    future = _async_sys_tags_pending.get(loop)
+    if future is None:
+        future = loop.run_in_executor(None, lambda: tuple(sys_tags()))
+        _async_sys_tags_pending[loop] = future
+
+        def done(future):
+            del _async_sys_tags_pending[loop]
+            if not future.cancelled() and future.exception() is None:
+                if not _async_sys_tags_result:
+                    _async_sys_tags_result.append(future.result())
+
+        future.add_done_callback(done)
+    return await asyncio.shield(future)
+
+
+async def async_select_best(filenames, tags=None):
+    """Yield the best compatible wheel file per project from an async iterable.
+
+    Every time a wheel file from 'filenames' becomes the best one seen so far
+    for its project, a (project, filename, rank) tuple is yielded, so the last
+    tuple for a project holds its best file. Incompatible files and invalid
+    file names are skipped. 'tags' defaults to async_sys_tags().
+
+    """
+    if tags is None:
+        tags = await async_sys_tags()
+    selector = _WheelSelector(_priority_index(tags))
+    async for filename in filenames:
+        _, rank = selector.check(filename)
+        if rank is None:
+            continue
+        project = selector.update(filename, rank)
+        if project is not None:
+            yield project, filename, rank
+
+
+def wheel_sort_key(tags=None):
+    """Return a key function sorting wheel files from most to least preferred.
+
+    Wheel files are ordered by the priority of their best tag in 'tags'
+    (sys_tags() by default), then by descending build tag and finally by file
+    name. Incompatible wheel files sort last. The key function raises
+    ValueError for invalid wheel file names.
+
+    """
+    index = _priority_index(tags)
+
+    def key(path):
+        wheel = parse_wheel_filename(path)
+        rank = index.best_rank(wheel.tags)
+        if wheel.build:
+            number, suffix = wheel.build
+        else:
+            number, suffix = -1, ""
+        # Negating the code points sorts the suffix in descending order, with
+        # the sentinel placing longer suffixes before their prefixes.
+        suffix_key = tuple(-ord(character) for character in suffix) + (1,)
+        return (
+            float("inf") if rank is None else rank,
+            -number,
+            suffix_key,
+            os.path.basename(os.fspath(path)),
+        )
+
+    return key
+
+
+def best_n(wheels, n=1, tags=None):
+    """Return the 'n' most preferred compatible wheel files from 'wheels'.
+
+    The order is that of wheel_sort_key(). A heap is used to select the wheel
+    files, so the candidates are never fully sorted.
+
+    """
+    import heapq
+
+    key = wheel_sort_key(tags)
+    keyed = ((key(wheel), index, wheel) for index, wheel in enumerate(wheels))
+    compatible = (item for item in keyed if item[0][0] != float("inf"))
+    return [wheel for _, _, wheel in heapq.nsmallest(n, compatible)]
+
+
+# The binary tag index format written by write_tag_index(). All integers are
+# unsigned 32-bit little-endian and every section is 4-byte aligned.
+#
+# Header: magic, format version, string count, tag count, wheel count,
+#   wheel tag reference count, string data size.
+# Strings: (string count + 1) offsets into the string data, followed by the
+#   UTF-8 string data. Strings are sorted by their encoded bytes.
+# Tags: (interpreter string, ABI string, platform string, rank) records sorted by
+#   their string numbers. Tags without a rank store _NO_RANK.
+# Wheels: (file name string, first tag reference, tag reference count) records
+#   sorted by file name.
+# Wheel tag references: tag record numbers for the wheels.
+_TAG_INDEX_MAGIC = b"PEP425TI"
+_TAG_INDEX_VERSION = 1
+_TAG_INDEX_HEADER = "<8s6I"
+_NO_RANK = 0xFFFFFFFF
+
+
+def _pack_tag_index(wheels=(), tags=(), priority=None):
+    """Return the binary tag index of the arguments to write_tag_index()."""
+    import struct
+
+    if hasattr(wheels, "items"):
+        wheels = wheels.items()
+    wheels = {
+        os.path.basename(os.fspath(filename)): frozenset(wheel_tags)
+        for filename, wheel_tags in wheels
+    }
+    ranks = {}
+    if priority is not None:
+        for rank, tag in enumerate(priority):
+            ranks.setdefault(tag, rank)
+    all_tags = set(tags).union(ranks, *wheels.values())
+
+    strings = set(wheels)
+    for tag in all_tags:
+        strings.update(tag._tags)
+    encoded_strings = sorted(string.encode("utf-8") for string in strings)
+    string_ids = {
+        string.decode("utf-8"): id_ for id_, string in enumerate(encoded_strings)
+    }
+    string_offsets = [0]
+    for string in encoded_strings:
+        string_offsets.append(string_offsets[-1] + len(string))
+    string_data = b"".join(encoded_strings)
+    string_data += b"\0" * (-len(string_data) % 4)
+
+    tag_records = sorted(
+        (tuple(string_ids[component] for component in tag._tags), tag)
+        for tag in all_tags
+    )
+    tag_ids = {tag: id_ for id_, (_, tag) in enumerate(tag_records)}
+    wheel_records = []
+    references = []
+    for filename in sorted(wheels, key=string_ids.__getitem__):
+        wheel_tag_ids = sorted(tag_ids[tag] for tag in wheels[filename])
+        wheel_records.append(
+            (string_ids[filename], len(references), len(wheel_tag_ids))
+        )
+        references.extend(wheel_tag_ids)
+
+    header = struct.pack(
+        _TAG_INDEX_HEADER,
+        _TAG_INDEX_MAGIC,
+        _TAG_INDEX_VERSION,
+        len(encoded_strings),
+        len(tag_records),
+        len(wheel_records),
+        len(references),
+        len(string_data),
+    )
+    tag_data = [
+        number
+        for component_ids, tag in tag_records
+        for number in component_ids + (ranks.get(tag, _NO_RANK),)
+    ]
+    wheel_data = [number for record in wheel_records for number in record]
+    return b"".join(
+        [
+            header,
+            struct.pack("<{}I".format(len(string_offsets)), *string_offsets),
+            string_data,
+            struct.pack("<{}I".format(len(tag_data)), *tag_data),
+            struct.pack("<{}I".format(len(wheel_data)), *wheel_data),
+            struct.pack("<{}I".format(len(references)), *references),
+        ]
+    )
+
+
+def write_tag_index(path, wheels=(), tags=(), priority=None):
+    """Write a binary index of wheel files and tags to 'path'.
+
+    'wheels' is a mapping or an iterable of pairs of wheel file names and their
+    tags, e.g. from parse_wheel_tag(). 'tags' are tags to include in addition to
+    those of the wheels, e.g. to store just a set of tags. If 'priority' is
+    given, e.g. sys_tags(), its tags are included along with their rank.
+
+    The file can be read with open_tag_index() without loading it into memory.
+
+    """
+    _write_atomically(path, _pack_tag_index(wheels, tags, priority))
+
+
+def open_tag_index(path):
+    """Memory-map the binary tag index at 'path' as a TagIndexView."""
+    import mmap
+
+    with open(path, "rb") as file:
+        mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        return TagIndexView(mapping, _owner=mapping)
+    except ValueError:
+        mapping.close()
+        raise
+
+
+class TagIndexView:
+
+    """Read-only view of a binary tag index in a buffer.
+
+    The view is a mapping from wheel file names to the frozenset of their tags.
+    Lookups work directly on the buffer, so only the parts of the index which
+    are used are ever read.
+
+    """
+
+    def __init__(self, buffer, _owner=None):
+        import struct
+
+        self._owner = _owner
+        self._uint = struct.Struct("<I")
+        self._tag_struct = struct.Struct("<4I")
+        self._wheel_struct = struct.Struct("<3I")
+        header = struct.Struct(_TAG_INDEX_HEADER)
+        if len(buffer) < header.size:
+            raise ValueError("not a tag index")
+        (
+            magic,
+            version,
+            self._string_count,
+            self._tag_count,
+            self._wheel_count,
+            reference_count,
+            string_data_size,
+        ) = header.unpack_from(buffer)
+        if magic != _TAG_INDEX_MAGIC:
+            raise ValueError("not a tag index")
+        if version != _TAG_INDEX_VERSION:
+            raise ValueError("unsupported tag index version {}".format(version))
+        self._string_offsets = header.size
+        self._string_data = self._string_offsets + 4 * (self._string_count + 1)
+        self._tags = self._string_data + string_data_size
+        self._wheels = self._tags + self._tag_struct.size * self._tag_count
+        self._references = self._wheels + self._wheel_struct.size * self._wheel_count
+        if len(buffer) < self._references + 4 * reference_count:
+            raise ValueError("truncated tag index")
+        # Only take a view of the buffer once it is known to be valid, so that
+        # the caller can close the buffer if it is not.
+        self._buffer = memoryview(buffer)
+
+    def close(self):
+        """Release the buffer, closing it if the view owns it."""
+        self._buffer.release()
+        if self._owner is not None:
+            self._owner.close()
+            self._owner = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _string_bytes(self, id_):
+        offset = self._string_offsets + 4 * id_
+        (start,) = self._uint.unpack_from(self._buffer, offset)
+        (end,) = self._uint.unpack_from(self._buffer, offset + 4)
+        data = self._string_data
+        return bytes(self._buffer[data + start : data + end])
+
+    def _string(self, id_):
+        return self._string_bytes(id_).decode("utf-8")
+
+    def _string_id(self, string):
+        """Return the number of 'string', or None if it is not in the index."""
+        encoded = string.encode("utf-8")
+        low, high = 0, self._string_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._string_bytes(middle) < encoded:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._string_count and self._string_bytes(low) == encoded:
+            return low
+        return None
+
+    def _tag_record(self, id_):
+        return self._tag_struct.unpack_from(
+            self._buffer, self._tags + self._tag_struct.size * id_
+        )
+
+    def _find_tag(self, tag):
+        """Return the record of 'tag', or None if it is not in the index."""
+        key = []
+        for component in tag._tags:
+            id_ = self._string_id(component)
+            if id_ is None:
+                return None
+            key.append(id_)
+        key = tuple(key)
+        low, high = 0, self._tag_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._tag_record(middle)[:3] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._tag_count:
+            record = self._tag_record(low)
+            if record[:3] == key:
+                return record
+        return None
+
+    def _tag(self, record):
+        return Tag.intern(*(self._string(id_) for id_ in record[:3]))
+
+    def _wheel_record(self, id_):
+        return self._wheel_struct.unpack_from(
+            self._buffer, self._wheels + self._wheel_struct.size * id_
+        )
+
+    def _find_wheel(self, filename):
+        string_id = self._string_id(filename)
+        if string_id is None:
+            return None
+        low, high = 0, self._wheel_count
+        while low < high:
+            middle = (low + high) // 2
+            if self._wheel_record(middle)[0] < string_id:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self._wheel_count:
+            record = self._wheel_record(low)
+            if record[0] == string_id:
+                return record
+        return None
+
+    def _wheel_tag_records(self, record):
+        _, start, count = record
+        for position in range(start, start + count):
+            (tag_id,) = self._uint.unpack_from(
+                self._buffer, self._references + 4 * position
+            )
+            yield self._tag_record(tag_id)
+
+    def __len__(self):
+        return self._wheel_count
+
+    def __iter__(self):
+        for id_ in range(self._wheel_count):
+            yield self._string(self._wheel_record(id_)[0])
+
+    def __contains__(self, filename):
+        return self._find_wheel(filename) is not None
+
+    def __getitem__(self, filename):
+        record = self._find_wheel(filename)
+        if record is None:
+            raise KeyError(filename)
+        return frozenset(map(self._tag, self._wheel_tag_records(record)))
+
+    def tags(self):
+        """Return an iterator over all tags in the index."""
+        return (self._tag(self._tag_record(id_)) for id_ in range(self._tag_count))
+
+    def has_tag(self, tag):
+        """Return True if 'tag' is in the index."""
+        return self._find_tag(tag) is not None
+
+    def rank(self, tag):
+        """Return the priority rank of 'tag', or None if it has none."""
+        record = self._find_tag(tag)
+        if record is None or record[3] == _NO_RANK:
+            return None
+        return record[3]
+
+    def best_rank(self, tags):
+        """Return the best rank among 'tags', or None if none have a rank.
+
+        Like TagPriorityIndex.best_rank(), so the view can be passed as the
+        priority 'tags' of e.g. select_best().
+
+        """
+        best = None
+        for tag in tags:
+            rank = self.rank(tag)
+            if rank is not None and (best is None or rank < best):
+                best = rank
+        return best
+
+    def wheel_best_rank(self, filename):
+        """Return the best rank of the tags of a wheel file, or None if none.
+
+        KeyError is raised if the wheel file is not in the index.
+
+        """
+        record = self._find_wheel(filename)
+        if record is None:
+            raise KeyError(filename)
+        ranks = [rank for *_, rank in self._wheel_tag_records(record)]
+        best = min(ranks, default=_NO_RANK)
+        return None if best == _NO_RANK else best
+
+
+def publish_tag_index(wheels=(), tags=(), priority=None, name=None):
+    """Publish a binary tag index in shared memory for other processes.
+
+    The arguments are those of write_tag_index(), plus an optional 'name' for
+    the shared memory block. Return the multiprocessing.shared_memory.SharedMemory
+    holding the index; other processes pass its name to attach_tag_index().
+
+    The publishing process owns the block and must call its close() and unlink()
+    methods once no process uses the index any more.
+
+    """
+    from multiprocessing import shared_memory
+
+    data = _pack_tag_index(wheels, tags, priority)
+    block = shared_memory.SharedMemory(name, create=True, size=max(len(data), 1))
+    block.buf[: len(data)] = data
+    return block
+
+
+def attach_tag_index(name):
+    """Attach read-only to the tag index published as 'name' as a TagIndexView.
+
+    Lookups run directly on the shared buffer. Closing the view detaches from
+    the shared memory block without destroying it.
+
+    """
+    if os.name == "posix" and sys.version_info < (3, 13):
+        # Before Python 3.13, SharedMemory registers every block it opens with
+        # the resource tracker, which would unlink the block when this process
+        # exits even though the publisher owns it. Unregistering it again is no
+        # way out either: spawned workers share the publisher's tracker, so that
+        # would drop the publisher's own registration. Map the block read-only
+        # directly instead; SharedMemory itself is built on _posixshmem on
+        # POSIX, so it is available wherever SharedMemory is.
+        import _posixshmem
+        import mmap
+
+        fd = _posixshmem.shm_open("/" + name.lstrip("/"), os.O_RDONLY)
+        try:
+            block = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+        buffer = memoryview(block)
+    else:
+        from multiprocessing import shared_memory
+
+        if sys.version_info >= (3, 13):
+            block = shared_memory.SharedMemory(name, track=False)
+        else:
+            # Windows has no resource tracker for shared memory.
+            block = shared_memory.SharedMemory(name)
+        buffer = block.buf.toreadonly()
+    try:
+        return TagIndexView(buffer, _owner=block)
+    except ValueError:
+        buffer.release()
+        block.close()
+        raise
+
+
+# Parsed PlatformTag instances keyed by platform tag string.
+_PLATFORM_TAGS = {}
+
+
+class PlatformTag:
+
+    """A platform tag split into its operating system, version and architecture.
+
+    'os' is the tag's prefix, e.g. "macosx", "manylinux", "linux" or "win".
+    'version' is the tuple of the minimum OS version for macOS, the minimum
+    glibc version for manylinux (including the legacy manylinux1, 2010 and 2014
+    aliases) and the minimum musl version for musllinux, and None for platforms
+    without a version. 'arch' is the architecture or macOS binary format, and
+    None for "any".
+
+    """
+
+    __slots__ = ["platform", "os", "version", "arch"]
+
+    def __init__(self, platform, os, version, arch):
+        self.platform = platform
+        self.os = os
+        self.version = version
+        self.arch = arch
+
+    def __eq__(self, other):
+        if not isinstance(other, PlatformTag):
+            return NotImplemented
+        return self.platform == other.platform
+
+    def __hash__(self):
+        return hash(self.platform)
+
+    def __str__(self):
+        return self.platform
+
+    def __repr__(self):
+        return "<PlatformTag {self.platform}>".format(self=self)
+
+
+def _split_versioned_platform(platform):
+    """Split "os_major_minor_arch" into its parts, or return None."""
+    parts = platform.split("_", 3)
+    if len(parts) == 4 and parts[1].isdigit() and parts[2].isdigit():
+        return parts[0], (int(parts[1]), int(parts[2])), parts[3]
+    return None
+
+
+def parse_platform(platform):
+    """Parse a platform tag string into a PlatformTag.
+
+    Each distinct string is only parsed once; later calls return the same
+    instance.
+
+    """
+    try:
+        return _PLATFORM_TAGS[platform]
+    except KeyError:
+        pass
+    os_name, _, arch = platform.partition("_")
+    version = None
+    if platform == "any":
+        arch = None
+    elif platform == "win32":
+        os_name, arch = "win", "x86"
+    elif os_name in {"macosx", "manylinux", "musllinux"}:
+        parts = _split_versioned_platform(platform)
+        if parts is not None:
+            os_name, version, arch = parts
+    else:
+        for glibc_version, (legacy_name, _) in _LEGACY_MANYLINUX.items():
+            if os_name == legacy_name:
+                os_name, version = "manylinux", glibc_version
+                break
+    result = PlatformTag(platform, os_name, version, arch or None)
+    return _PLATFORM_TAGS.setdefault(platform, result)
+
+
+class PlatformIndex:
+
+    """Index of wheel files by the OS, version and architecture of their platforms.
+
+    'wheels' is an iterable of wheel file names. A wheel with several platform
+    tags is indexed under each of them.
+
+    """
+
+    def __init__(self, wheels=()):
+        # (os, arch) -> sorted versions and the wheels at the same positions.
+        # Platforms without a version sort before all versions.
+        self._versions = {}
+        self._wheels = {}
+        entries = {}
+        for path in wheels:
+            filename = os.path.basename(os.fspath(path))
+            platforms = {tag.platform for tag in parse_wheel_tag(filename)}
+            for platform in platforms:
+                platform_tag = parse_platform(platform)
+                key = platform_tag.os, platform_tag.arch
+                entries.setdefault(key, []).append(
+                    (platform_tag.version or (), filename)
+                )
+        for key, key_entries in entries.items():
+            key_entries.sort()
+            self._versions[key] = [version for version, _ in key_entries]
+            self._wheels[key] = [filename for _, filename in key_entries]
+
+    def select(self, os, arch=None, min_version=None, max_version=None):
+        """Return the wheels with a platform for 'os' within the version range.
+
+        Both version bounds are inclusive. If 'arch' is None, wheels for every
+        architecture are returned, otherwise only those which run on 'arch'. For
+        macOS these include the binary formats containing 'arch', e.g. "intel"
+        and "universal" wheels for x86_64. Wheels are ordered by the version of
+        their platform.
+
+        To find the wheels which run on macOS 10.12 on x86_64 and any later
+        version, select("macosx", "x86_64", max_version=(10, 12)).
+
+        """
+        if arch is None or os == "macosx":
+            keys = [key for key in self._versions if key[0] == os]
+        else:
+            keys = [(os, arch)]
+        matches = []
+        for key in keys:
+            versions = self._versions.get(key, [])
+            start, end = 0, len(versions)
+            if min_version is not None:
+                start = bisect.bisect_left(versions, tuple(min_version))
+            if max_version is not None:
+                end = bisect.bisect_right(versions, tuple(max_version))
+            wheels = self._wheels.get(key, [])
+            key_matches = zip(versions[start:end], wheels[start:end])
+            if os == "macosx" and arch is not None:
+                # Which binary formats run on 'arch' depends on the version.
+                key_matches = (
+                    (version, filename)
+                    for version, filename in key_matches
+                    if key[1] in _mac_compatible_formats(version, arch)
+                )
+            matches.extend(key_matches)
+        if len(keys) > 1:
+            matches.sort()
+        selected = {}
+        for _, filename in matches:
+            selected.setdefault(filename, None)
+        return list(selected)
+
+
+# ELF e_machine values and the architecture names used in platform tags, for
+# 32-bit and 64-bit files respectively.
+_ELF_MACHINES = {
+    3: ("i686", "i686"),  # EM_386
+    8: ("mips", "mips64"),  # EM_MIPS
+    20: ("ppc", "ppc"),  # EM_PPC
+    21: ("ppc64", "ppc64"),  # EM_PPC64
+    22: ("s390", "s390x"),  # EM_S390
+    40: ("armv7l", "armv7l"),  # EM_ARM
+    62: ("x86_64", "x86_64"),  # EM_X86_64
+    183: ("aarch64", "aarch64"),  # EM_AARCH64
+    243: ("riscv32", "riscv64"),  # EM_RISCV
+    258: ("loongarch32", "loongarch64"),  # EM_LOONGARCH
+}
+_ELF_PT_INTERP = 3
+_ELF_SHT_GNU_VERNEED = 0x6FFFFFFE
+
+
+class ElfInfo(
+    collections.namedtuple("ElfInfo", ["arch", "libc", "glibc_version", "interpreter"])
+):
+
+    """The platform details of an ELF executable, as found by inspect_elf().
+
+    'libc' is "glibc", "musl" or None if unknown, and 'interpreter' is the path
+    of the program interpreter (dynamic loader), or None for static files.
+    'glibc_version' is the newest GLIBC_x.y symbol version the file requires as
+    a (major, minor) tuple, which is a lower bound of the glibc it runs with,
+    and None for non-glibc files.
+
+    'arch' and 'glibc_version' are what target_tags() takes as 'arch' and
+    'libc_version'.
+
+    """
+
+    __slots__ = ()
+
+    def platforms(self):
+        """Return the Linux platform tags of the file, most specific first."""
+        return _linux_target_platforms(self.arch, self.glibc_version)
+
+
+def inspect_elf(path):
+    """Return the ElfInfo of the ELF executable at 'path'.
+
+    The file is memory-mapped and only its headers, program interpreter and
+    version requirements are read; nothing is executed, so the file can be for
+    any architecture. ValueError is raised if the file is not a valid ELF file.
+
+    """
+    import mmap
+    import struct
+
+    with open(path, "rb") as file:
+        try:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # Empty file.
+            raise ValueError("{} is not an ELF file".format(path))
+    try:
+        if data[:4] != b"\x7fELF" or data[4:5] not in (b"\1", b"\2"):
+            raise ValueError("{} is not an ELF file".format(path))
+        return _inspect_elf(data)
+    except struct.error:
+        raise ValueError("{} is a truncated ELF file".format(path))
+    finally:
+        data.close()
+
+
+def _inspect_elf(data):
+    """Return the ElfInfo of the ELF file in the buffer 'data'."""
+    import struct
+
+    is_64bit = data[4:5] == b"\2"
+    order = ">" if data[5:6] == b"\2" else "<"
+    if is_64bit:
+        header = order + "HHIQQQIHHHHHH"
+        program_header = order + "IIQQQQQQ"
+        section_header = order + "IIQQQQIIQQ"
+    else:
+        header = order + "HHIIIIIHHHHHH"
+        program_header = order + "IIIIIIII"
+        section_header = order + "IIIIIIIIII"
+    (
+        _,
+        machine,
+        _,
+        _,
+        program_offset,
+        section_offset,
+        _,
+        _,
+        program_size,
+        program_count,
+        section_size,
+        section_count,
+        _,
+    ) = struct.unpack_from(header, data, 16)
+
+    arch = _ELF_MACHINES.get(machine, ("unknown", "unknown"))[is_64bit]
+    if arch == "ppc64" and order == "<":
+        arch = "ppc64le"
+
+    interpreter = None
+    for index in range(program_count):
+        fields = struct.unpack_from(
+            program_header, data, program_offset + index * program_size
+        )
+        if fields[0] != _ELF_PT_INTERP:
+            continue
+        # The field order differs between 32-bit and 64-bit program headers.
+        offset, size = (fields[2], fields[5]) if is_64bit else (fields[1], fields[4])
+        interpreter = data[offset : offset + size].split(b"\0")[0]
+        interpreter = interpreter.decode("utf-8", "surrogateescape")
+        break
+
+    glibc_versions = set()
+    for index in range(section_count):
+        fields = struct.unpack_from(
+            section_header, data, section_offset + index * section_size
+        )
+        if fields[1] == _ELF_SHT_GNU_VERNEED:
+            _, _, _, _, offset, _, link, count, _, _ = fields
+            strings = struct.unpack_from(
+                section_header, data, section_offset + link * section_size
+            )[4]
+            glibc_versions.update(
+                _elf_glibc_versions(data, order, offset, count, strings)
+            )
+
+    loader = os.path.basename(interpreter or "")
+    if loader.startswith("ld-musl"):
+        libc = "musl"
+    elif glibc_versions:
+        libc = "glibc"
+    else:
+        libc = None
+    glibc_version = max(glibc_versions) if libc == "glibc" else None
+    return ElfInfo(arch, libc, glibc_version, interpreter)
+
+
+def _elf_glibc_versions(data, order, offset, count, strings):
+    """Yield the GLIBC_x.y versions in a .gnu.version_r section."""
+    import struct
+
+    needed = order + "HHIII"
+    auxiliary = order + "IHHII"
+    for _ in range(count):
+        _, aux_count, _, aux_offset, next_offset = struct.unpack_from(
+            needed, data, offset
+        )
+        position = offset + aux_offset
+        for _ in range(aux_count):
+            _, _, _, name, next_aux = struct.unpack_from(auxiliary, data, position)
+            start = strings + name
+            end = data.find(b"\0", start)
+            name = data[start:end] if end >= 0 else b""
+            if name.startswith(b"GLIBC_"):
+                parts = name[6:].split(b".")
+                if len(parts) >= 2 and parts[0].isdigit() and parts[1].isdigit():
+                    yield int(parts[0]), int(parts[1])
+            position += next_aux
+        offset += next_offset
+
+
+# XXX Test _linux_platforms()
+# XXX Test on Windows; should just work.
+
+
+# XXX https://pypi.org/project/mysql-connector-python/#files
+# XXX https://pypi.org/project/pip/#files
+# XXX https://pypi.org/project/numpy/#files
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,6 @@
 import distutils.util
+import io
+import json
 import os.path
 
 try:
@@ -6,6 +8,7 @@ try:
 except ImportError:
     pathlib = None
 import platform
+import subprocess
 import sys
 import sysconfig
 import types
@@ -130,8 +133,16 @@ def test_macOS_architectures(arch, is_32bit, expected):
 @pytest.mark.parametrize(
     "version,arch,expected",
     [
-        ((10, 17), "x86_64", ["x86_64", "intel", "fat64", "fat32", "universal"]),
-        ((10, 4), "x86_64", ["x86_64", "intel", "fat64", "fat32", "universal"]),
+        (
+            (10, 17),
+            "x86_64",
+            ["x86_64", "intel", "fat64", "fat32", "universal2", "universal"],
+        ),
+        (
+            (10, 4),
+            "x86_64",
+            ["x86_64", "intel", "fat64", "fat32", "universal2", "universal"],
+        ),
         ((10, 3), "x86_64", []),
         ((10, 17), "i386", ["i386", "intel", "fat32", "fat", "universal"]),
         ((10, 4), "i386", ["i386", "intel", "fat32", "fat", "universal"]),
@@ -144,6 +155,7 @@ def test_macOS_architectures(arch, is_32bit, expected):
         ((10, 7), "ppc", []),
         ((10, 6), "ppc", ["ppc", "fat32", "fat", "universal"]),
         ((10, 0), "ppc", ["ppc", "fat32", "fat", "universal"]),
+        ((11, 0), "arm64", ["arm64", "universal2"]),
     ],
 )
 def test_macOS_binary_formats(version, arch, expected):
@@ -157,19 +169,45 @@ def test_mac_platforms():
         "macosx_10_5_intel",
         "macosx_10_5_fat64",
         "macosx_10_5_fat32",
+        "macosx_10_5_universal2",
         "macosx_10_5_universal",
         "macosx_10_4_x86_64",
         "macosx_10_4_intel",
         "macosx_10_4_fat64",
         "macosx_10_4_fat32",
+        "macosx_10_4_universal2",
         "macosx_10_4_universal",
     ]
 
-    assert len(pep425._mac_platforms((10, 17), "x86_64")) == 14 * 5
+    assert len(pep425._mac_platforms((10, 17), "x86_64")) == 14 * 6
 
     assert not pep425._mac_platforms((10, 0), "x86_64")
 
 
+def test_mac_platforms_11_and_later():
+    platforms = pep425._mac_platforms((12, 3), "arm64")
+    assert platforms[:4] == [
+        "macosx_12_0_arm64",
+        "macosx_12_0_universal2",
+        "macosx_11_0_arm64",
+        "macosx_11_0_universal2",
+    ]
+    assert platforms[4:] == [
+        "macosx_10_{}_universal2".format(minor) for minor in range(16, 3, -1)
+    ]
+
+    platforms = pep425._mac_platforms((11, 0), "x86_64")
+    assert platforms[:6] == [
+        "macosx_11_0_x86_64",
+        "macosx_11_0_intel",
+        "macosx_11_0_fat64",
+        "macosx_11_0_fat32",
+        "macosx_11_0_universal2",
+        "macosx_11_0_universal",
+    ]
+    assert platforms[6:] == pep425._mac_platforms((10, 16), "x86_64")
+
+
 def test_macOS_version_detection(monkeypatch):
     if platform.system() != "Darwin":
         monkeypatch.setattr(
@@ -195,7 +233,7 @@ def test_cpython_abi_py3(monkeypatch):
         monkeypatch.setattr(
             sysconfig, "get_config_var", lambda key: "'cpython-37m-darwin'"
         )
-    _, soabi, _ = sysconfig.get_config_var("SOABI").split("-")
+    soabi = sysconfig.get_config_var("SOABI").split("-")[1]
     assert "cp{soabi}".format(soabi=soabi) == pep425._cpython_abi(sys.version_info[:2])
 
 
@@ -268,6 +306,7 @@ def test_sys_tags_on_mac_cpython(monkeypatch):
         monkeypatch.setattr(platform, "python_implementation", lambda: "CPython")
         monkeypatch.setattr(pep425, "_cpython_abi", lambda py_version: "cp33m")
     if platform.system() != "Darwin":
+        monkeypatch.setattr(platform, "system", lambda: "Darwin")
         monkeypatch.setattr(pep425, "_mac_platforms", lambda: ["macosx_10_5_x86_64"])
     abi = pep425._cpython_abi(sys.version_info[:2])
     platforms = pep425._mac_platforms()
@@ -308,6 +347,7 @@ def test_sys_tags_on_mac_pypy(monkeypatch):
         monkeypatch.setattr(platform, "python_implementation", lambda: "PyPy")
         monkeypatch.setattr(pep425, "_pypy_interpreter", lambda: "pp360")
     if platform.system() != "Darwin":
+        monkeypatch.setattr(platform, "system", lambda: "Darwin")
         monkeypatch.setattr(pep425, "_mac_platforms", lambda: ["macosx_10_5_x86_64"])
     interpreter = pep425._pypy_interpreter()
     abi = pep425._generic_abi()
@@ -339,3 +379,1661 @@ def test_generic_tags():
         pep425.Tag("sillywalk33", "none", "plat1"),
         pep425.Tag("sillywalk33", "none", "plat2"),
     ]
+
+
+def test_TagPriorityIndex_rank():
+    tags = [
+        pep425.Tag("cp37", "cp37m", "plat"),
+        pep425.Tag("cp37", "none", "plat"),
+        pep425.Tag("py3", "none", "any"),
+        pep425.Tag("cp37", "cp37m", "plat"),
+    ]
+    index = pep425.TagPriorityIndex(tags)
+    assert len(index) == 3
+    assert index.rank(tags[0]) == 0
+    assert index.rank(tags[2]) == 2
+    assert index.rank(pep425.Tag("py2", "none", "any")) is None
+    assert tags[1] in index
+    assert list(index) == tags[:3]
+
+
+def test_TagPriorityIndex_best_rank():
+    index = pep425.TagPriorityIndex(
+        [pep425.Tag("cp37", "cp37m", "plat"), pep425.Tag("py3", "none", "any")]
+    )
+    assert index.best_rank(pep425.parse_wheel_tag("pip-18.0-py2.py3-none-any.whl")) == 1
+    assert index.best_rank(pep425.parse_tag("cp36-cp36m-plat")) is None
+    assert index.best_rank(pep425.parse_tag("cp37.py3-cp37m.none-plat.any")) == 0
+
+
+def test_TagPriorityIndex_defaults_to_sys_tags(monkeypatch):
+    tags = [pep425.Tag("cp37", "cp37m", "plat"), pep425.Tag("py3", "none", "any")]
+    monkeypatch.setattr(pep425, "sys_tags", lambda: iter(tags))
+    index = pep425.TagPriorityIndex()
+    assert index.rank(tags[0]) == 0
+    assert index.rank(tags[-1]) == tags.index(tags[-1])
+
+
+@pytest.fixture
+def priority_tags():
+    return [
+        pep425.Tag("cp37", "cp37m", "manylinux1_x86_64"),
+        pep425.Tag("cp37", "abi3", "manylinux1_x86_64"),
+        pep425.Tag("py3", "none", "any"),
+    ]
+
+
+def test_rank_wheels(priority_tags):
+    filenames = [
+        "numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl",
+        "numpy-1.15.0-cp36-cp36m-manylinux1_x86_64.whl",
+        "pip-18.0-py2.py3-none-any.whl",
+        "pip-18.0.tar.gz",
+        "spam-1.0-py3-none-any-extra.whl",
+    ]
+    assert list(pep425.rank_wheels(filenames, priority_tags)) == [
+        (filenames[0], 0),
+        (filenames[1], None),
+        (filenames[2], 2),
+        (filenames[3], None),
+        (filenames[4], None),
+    ]
+
+
+def test_rank_wheels_accepts_index(priority_tags):
+    index = pep425.TagPriorityIndex(priority_tags)
+    filename = "pip-18.0-py2.py3-none-any.whl"
+    assert list(pep425.rank_wheels([filename], index)) == [(filename, 2)]
+
+
+def test_select_best(priority_tags):
+    filenames = iter(
+        [
+            "Foo_Bar-1.0-py3-none-any.whl",
+            "numpy-1.15.0-cp36-cp36m-manylinux1_x86_64.whl",
+            "foo.bar-1.0-cp37-abi3-manylinux1_x86_64.whl",
+            "numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl",
+            "numpy-1.15.0-py3-none-any.whl",
+            "pip-18.0.tar.gz",
+            "pip-18.0-py3-none-any.tar.gz",
+            "pip-18.0-py3-none-any.whl.metadata",
+        ]
+    )
+    rejects = []
+    best, rejected = pep425.select_best(
+        filenames, priority_tags, lambda *reject: rejects.append(reject)
+    )
+    assert best == {
+        "foo-bar": "foo.bar-1.0-cp37-abi3-manylinux1_x86_64.whl",
+        "numpy": "numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl",
+    }
+    assert rejected == 4
+    assert rejects == [
+        ("numpy-1.15.0-cp36-cp36m-manylinux1_x86_64.whl", "incompatible"),
+        ("pip-18.0.tar.gz", "invalid"),
+        ("pip-18.0-py3-none-any.tar.gz", "invalid"),
+        ("pip-18.0-py3-none-any.whl.metadata", "invalid"),
+    ]
+
+
+def test_select_best_ties_keep_first(priority_tags):
+    filenames = ["pip-18.0-py3-none-any.whl", "pip-18.1-py3-none-any.whl"]
+    best, rejected = pep425.select_best(filenames, priority_tags)
+    assert best == {"pip": "pip-18.0-py3-none-any.whl"}
+    assert not rejected
+
+
+def test_Tag_slots(example_tag):
+    with pytest.raises(AttributeError):
+        example_tag.extra = None
+
+
+def test_Tag_intern():
+    tag = pep425.Tag.intern("py3", "none", "any")
+    assert tag is pep425.Tag.intern("py3", "none", "any")
+    assert tag is pep425.Tag.intern("PY3", "None", "ANY")
+    assert tag == pep425.Tag("py3", "none", "any")
+
+
+def test_clear_interned():
+    tag = pep425.Tag.intern("PY3", "None", "ANY")
+    tags = pep425.parse_tag("py3-none-any")
+    platform_tag = pep425.parse_platform("manylinux1_x86_64")
+    assert ("PY3", "None", "ANY") not in pep425._INTERNED_TAGS
+    pep425.clear_interned()
+    assert not pep425._INTERNED_TAGS
+    assert not pep425._INTERNED_TAG_SETS
+    assert not pep425._PLATFORM_TAGS
+    assert pep425.Tag.intern("py3", "none", "any") is not tag
+    assert pep425.parse_tag("py3-none-any") == tags
+    assert pep425.parse_platform("manylinux1_x86_64") == platform_tag
+
+
+def test_Tag_pickling(example_tag):
+    import pickle
+
+    unpickled = pickle.loads(pickle.dumps(example_tag))
+    assert unpickled == example_tag
+    assert hash(unpickled) == hash(example_tag)
+
+
+def test_parse_tag_interned():
+    pep425.clear_interned()
+    first = pep425.parse_tag("py2.py3-none-any")
+    assert first is pep425.parse_tag("py2.py3-none-any")
+    assert not pep425._INTERNED_TAGS
+
+
+def test_parse_tag_platform_specific_not_interned():
+    tag = "cp37-cp37m-manylinux1_x86_64"
+    assert pep425.parse_tag(tag) is not pep425.parse_tag(tag)
+    assert pep425.parse_tag(tag) == pep425.parse_tag(tag)
+
+
+def test_ParseCache_bounds_memory():
+    pep425.clear_interned()
+    cache = pep425.ParseCache(maxsize=2)
+    for version in range(10):
+        cache.parse_tag("cp3{0}-cp3{0}m-manylinux1_x86_64".format(version))
+    assert cache.stats()["size"] == 2
+    assert not pep425._INTERNED_TAGS
+    assert not pep425._INTERNED_TAG_SETS
+
+
+def test_ParseCache():
+    cache = pep425.ParseCache(maxsize=2)
+    expected = pep425.parse_tag("cp37-cp37m-manylinux1_x86_64")
+    assert cache.parse_tag("cp37-cp37m-manylinux1_x86_64") == expected
+    assert (
+        cache.parse_wheel_tag("numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl")
+        == expected
+    )
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1, "maxsize": 2}
+
+
+def test_ParseCache_eviction():
+    cache = pep425.ParseCache(maxsize=2)
+    cache.parse_tag("py2-none-any")
+    cache.parse_tag("py3-none-any")
+    cache.parse_tag("py2-none-any")
+    cache.parse_tag("py2.py3-none-any")  # Evicts py3-none-any.
+    cache.parse_tag("py2-none-any")
+    assert cache.stats()["hits"] == 2
+    cache.parse_tag("py3-none-any")
+    assert cache.stats() == {"hits": 2, "misses": 4, "size": 2, "maxsize": 2}
+
+
+def test_ParseCache_clear():
+    cache = pep425.ParseCache()
+    cache.parse_tag("py3-none-any")
+    cache.parse_tag("py3-none-any")
+    cache.clear()
+    assert cache.stats() == {"hits": 0, "misses": 0, "size": 0, "maxsize": 1024}
+
+
+@pytest.fixture
+def counted_sys_tags(monkeypatch):
+    tags = [pep425.Tag("cp37", "cp37m", "plat"), pep425.Tag("py3", "none", "any")]
+    calls = []
+
+    def sys_tags():
+        calls.append(None)
+        return iter(tags)
+
+    monkeypatch.setattr(pep425, "sys_tags", sys_tags)
+    return tags, calls
+
+
+def test_cached_sys_tags(counted_sys_tags, tmp_path):
+    tags, calls = counted_sys_tags
+    path = tmp_path / "tags.json"
+    assert pep425.cached_sys_tags(path) == tags
+    assert pep425.cached_sys_tags(path) == tags
+    assert len(calls) == 1
+
+
+def test_cached_sys_tags_invalidation(counted_sys_tags, tmp_path, monkeypatch):
+    tags, calls = counted_sys_tags
+    path = tmp_path / "tags.json"
+    pep425.cached_sys_tags(path)
+    fingerprint = pep425._interpreter_fingerprint()
+    fingerprint["libc"] = "glibc 1.0"
+    monkeypatch.setattr(pep425, "_interpreter_fingerprint", lambda: fingerprint)
+    assert pep425.cached_sys_tags(path) == tags
+    assert len(calls) == 2
+    assert pep425.cached_sys_tags(path) == tags
+    assert len(calls) == 2
+
+
+def test_cached_sys_tags_os_upgrade(counted_sys_tags, tmp_path, monkeypatch):
+    tags, calls = counted_sys_tags
+    path = tmp_path / "tags.json"
+    pep425.cached_sys_tags(path)
+    fingerprint = pep425._interpreter_fingerprint()
+    fingerprint["system"][1] += ".1"
+    monkeypatch.setattr(pep425, "_interpreter_fingerprint", lambda: fingerprint)
+    pep425.cached_sys_tags(path)
+    assert len(calls) == 2
+
+
+def test_write_atomically_failure(tmp_path):
+    path = tmp_path / "data.txt"
+    path.write_text("old")
+    with pytest.raises(UnicodeEncodeError):
+        pep425._write_atomically(path, "\ud800")
+    assert path.read_text() == "old"
+    assert os.listdir(tmp_path) == ["data.txt"]
+
+
+def test_cached_sys_tags_corrupt(counted_sys_tags, tmp_path):
+    tags, calls = counted_sys_tags
+    path = tmp_path / "tags.json"
+    path.write_text("{")
+    assert pep425.cached_sys_tags(path) == tags
+    assert pep425.cached_sys_tags(path) == tags
+    assert len(calls) == 1
+
+
+def test_cached_sys_tags_unwritable(counted_sys_tags, tmp_path):
+    tags, calls = counted_sys_tags
+    path = tmp_path / "missing" / "tags.json"
+    assert pep425.cached_sys_tags(path) == tags
+    assert not path.exists()
+
+
+# Importing distutils alone is known to take hundreds of milliseconds.
+IMPORT_TIME_BUDGET_US = 100000
+
+
+def _run_python(*args):
+    return subprocess.run(
+        [sys.executable, *args],
+        cwd=os.path.dirname(os.path.abspath(pep425.__file__)),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+
+def test_import_is_lazy():
+    code = "import sys; import pep425; print(' '.join(sorted(sys.modules)))"
+    modules = _run_python("-c", code).stdout.split()
+    for name in ("distutils", "distutils.util", "platform", "sysconfig", "ctypes"):
+        assert name not in modules
+
+
+def test_import_time_budget():
+    stderr = _run_python("-X", "importtime", "-c", "import pep425").stderr
+    for line in stderr.splitlines():
+        fields = line.replace(":", "|").split("|")
+        cumulative, name = fields[2].strip(), fields[3].strip()
+        if name == "pep425":
+            assert int(cumulative) < IMPORT_TIME_BUDGET_US
+            break
+    else:
+        pytest.fail("pep425 missing from -X importtime output")
+
+
+@pytest.mark.parametrize(
+    "arch,expected",
+    [
+        ("x86", ["win32"]),
+        ("AMD64", ["win_amd64"]),
+        ("x86_64", ["win_amd64"]),
+        ("arm64", ["win_arm64"]),
+        ("ia-64", ["win_ia_64"]),
+    ],
+)
+def test_windows_platforms(arch, expected):
+    assert pep425._windows_platforms(arch) == expected
+
+
+def test_windows_platforms_detection(monkeypatch):
+    monkeypatch.setattr(distutils.util, "get_platform", lambda: "win-amd64")
+    assert pep425._windows_platforms() == ["win_amd64"]
+
+
+@pytest.mark.parametrize(
+    "arch,libc_version,expected",
+    [
+        ("x86_64", None, ["linux_x86_64"]),
+        (
+            "x86_64",
+            (2, 13),
+            [
+                "manylinux_2_13_x86_64",
+                "manylinux_2_12_x86_64",
+                "manylinux2010_x86_64",
+                "manylinux_2_11_x86_64",
+                "manylinux_2_10_x86_64",
+                "manylinux_2_9_x86_64",
+                "manylinux_2_8_x86_64",
+                "manylinux_2_7_x86_64",
+                "manylinux_2_6_x86_64",
+                "manylinux_2_5_x86_64",
+                "manylinux1_x86_64",
+                "linux_x86_64",
+            ],
+        ),
+        ("i686", (2, 5), ["manylinux_2_5_i686", "manylinux1_i686", "linux_i686"]),
+        ("i686", (2, 4), ["linux_i686"]),
+        (
+            "aarch64",
+            (2, 18),
+            [
+                "manylinux_2_18_aarch64",
+                "manylinux_2_17_aarch64",
+                "manylinux2014_aarch64",
+                "linux_aarch64",
+            ],
+        ),
+        ("aarch64", (2, 12), ["linux_aarch64"]),
+    ],
+)
+def test_linux_target_platforms(arch, libc_version, expected):
+    assert pep425._linux_target_platforms(arch, libc_version) == expected
+
+
+def test_target_tags_linux_cpython():
+    tags = list(
+        pep425.target_tags(
+            "cpython", (3, 7), platform="linux", arch="x86_64", libc_version=(2, 17)
+        )
+    )
+    platforms = pep425._linux_target_platforms("x86_64", (2, 17))
+    assert "manylinux2014_x86_64" in platforms
+    expected = list(pep425._cpython_tags((3, 7), "cp37", "cp37m", platforms))
+    assert tags[: len(expected)] == expected
+    assert tags[-1] == pep425.Tag("py30", "none", "any")
+
+
+def test_target_tags_default_cpython_abi():
+    assert next(pep425.target_tags("cp", (3, 8))) == pep425.Tag("cp38", "cp38", "any")
+    assert next(pep425.target_tags("cp", (3, 6))) == pep425.Tag("cp36", "cp36m", "any")
+
+
+def test_target_tags_cpython2_abi():
+    with pytest.raises(ValueError):
+        pep425.target_tags("cp", (2, 7))
+    tags = pep425.target_tags("cp", (2, 7), "cp27mu")
+    assert next(tags) == pep425.Tag("cp27", "cp27mu", "any")
+
+
+def test_target_tags_macos():
+    tags = list(
+        pep425.target_tags(
+            "cp", (3, 7), "cp37m", "macos", arch="x86_64", macos_version=(10, 14)
+        )
+    )
+    platforms = pep425._mac_platforms((10, 14), "x86_64")
+    assert tags[0] == pep425.Tag("cp37", "cp37m", platforms[0])
+    assert tags[len(platforms) - 1] == pep425.Tag("cp37", "cp37m", platforms[-1])
+
+
+def test_target_tags_windows():
+    tags = list(pep425.target_tags("cp", (3, 7), platform="windows", arch="amd64"))
+    assert tags[0] == pep425.Tag("cp37", "cp37m", "win_amd64")
+
+
+def test_target_tags_pypy():
+    with pytest.raises(ValueError):
+        pep425.target_tags("pypy", (3, 6))
+    tags = list(
+        pep425.target_tags(
+            "pypy", (3, 6), "pypy3_60", "linux", "x86_64", interpreter="pp360"
+        )
+    )
+    assert tags[:2] == [
+        pep425.Tag("pp360", "pypy3_60", "linux_x86_64"),
+        pep425.Tag("pp360", "none", "linux_x86_64"),
+    ]
+
+
+def test_target_tags_generic():
+    tags = list(pep425.target_tags("jython", (2, 7), platform="java-1.8.0"))
+    assert tags[0] == pep425.Tag("jy27", "none", "java_1_8_0")
+
+
+def test_target_tags_missing_details():
+    with pytest.raises(ValueError):
+        pep425.target_tags("cp", (3, 7), platform="linux")
+    with pytest.raises(ValueError):
+        pep425.target_tags("cp", (3, 7), platform="macos", arch="x86_64")
+
+
+def test_TagVocabulary(example_tag):
+    vocabulary = pep425.TagVocabulary()
+    key = vocabulary.encode(example_tag)
+    assert len(vocabulary) == 3
+    assert vocabulary.decode(key) == example_tag
+    assert vocabulary.encode(pep425.Tag("py3", "none", "any")) == key
+    assert vocabulary.component(vocabulary.component_id("none")) == "none"
+    assert vocabulary.encode(pep425.Tag("py2", "none", "any"), add=False) is None
+    assert len(vocabulary) == 3
+    assert 0 <= key < 2 ** 64
+
+
+@pytest.fixture
+def matrix_case():
+    targets = [
+        list(pep425.target_tags("cp", (3, 7), platform="linux", arch="x86_64")),
+        list(
+            pep425.target_tags(
+                "cp", (3, 7), platform="linux", arch="x86_64", libc_version=(2, 17)
+            )
+        ),
+        list(pep425.target_tags("cp", (3, 6), platform="windows", arch="amd64")),
+    ]
+    filenames = [
+        "numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl",
+        "numpy-1.15.0-cp36-cp36m-win_amd64.whl",
+        "pip-18.0-py2.py3-none-any.whl",
+        "numpy-1.15.0-cp27-cp27mu-manylinux1_x86_64.whl",
+        "pip-18.0-py2.py3-none-any.whl",
+    ]
+    expected = []
+    for filename in filenames:
+        tags = pep425.parse_wheel_tag(filename)
+        row = []
+        for target in targets:
+            rank = pep425.TagPriorityIndex(target).best_rank(tags)
+            row.append(-1 if rank is None else rank)
+        expected.append(row)
+    return filenames, targets, expected
+
+
+def test_compatibility_matrix_python(matrix_case):
+    filenames, targets, expected = matrix_case
+    matrix = pep425.compatibility_matrix(filenames, targets, backend="python")
+    assert matrix == expected
+    assert matrix[0][0] == -1
+    assert matrix[3] == [-1, -1, -1]
+
+
+def test_compatibility_matrix_numpy(matrix_case):
+    pytest.importorskip("numpy")
+    filenames, targets, expected = matrix_case
+    matrix = pep425.compatibility_matrix(filenames, targets, backend="numpy")
+    assert matrix.shape == (len(filenames), len(targets))
+    assert matrix.tolist() == expected
+
+
+@pytest.mark.parametrize("backend", ["python", "numpy"])
+def test_compatibility_matrix_invalid_filenames(matrix_case, backend):
+    if backend == "numpy":
+        pytest.importorskip("numpy")
+    filenames, targets, expected = matrix_case
+    invalid = ["pip-18.0.tar.gz", "pip-18.0-py3-none-any.whl.metadata"]
+    matrix = pep425.compatibility_matrix(invalid + filenames, targets, backend=backend)
+    if backend == "numpy":
+        matrix = matrix.tolist()
+    assert matrix == [[-1] * len(targets)] * 2 + expected
+
+
+def test_compatibility_matrix_unknown_backend():
+    with pytest.raises(ValueError):
+        pep425.compatibility_matrix([], [], backend="fortran")
+
+
+@pytest.mark.parametrize("backend", ["python", "numpy"])
+def test_compatibility_matrix_no_targets(backend):
+    if backend == "numpy":
+        pytest.importorskip("numpy")
+    filenames = ["pip-18.0-py2.py3-none-any.whl"] * 2
+    matrix = pep425.compatibility_matrix(filenames, [], backend=backend)
+    if backend == "numpy":
+        assert matrix.shape == (2, 0)
+        matrix = matrix.tolist()
+    assert matrix == [[], []]
+
+
+def test_compatibility_matrix_numpy_missing(monkeypatch):
+    monkeypatch.setattr(pep425, "_numpy", lambda: None)
+    with pytest.raises(ImportError):
+        pep425.compatibility_matrix([], [], backend="numpy")
+    assert pep425.compatibility_matrix([], []) == []
+
+
+def test_CompactTagSet():
+    vocabulary = pep425.TagVocabulary()
+    tags = pep425.parse_tag("py2.py3-none-any")
+    compact = pep425.CompactTagSet(vocabulary, tags)
+    assert len(compact) == 2
+    assert compact == tags
+    assert set(compact) == tags
+    assert pep425.Tag("py3", "none", "any") in compact
+    assert pep425.Tag("py3", "abi3", "any") not in compact
+    assert pep425.Tag("cp37", "none", "any") not in compact
+    assert compact == pep425.CompactTagSet(vocabulary, tags)
+    assert compact == pep425.CompactTagSet(pep425.TagVocabulary(), tags)
+    assert compact != pep425.CompactTagSet(vocabulary)
+
+
+def test_CompactTagSet_intersection():
+    vocabulary = pep425.TagVocabulary()
+    compact = pep425.CompactTagSet(vocabulary, pep425.parse_tag("py2.py3-none-any"))
+    other = pep425.CompactTagSet(vocabulary, pep425.parse_tag("py3.py4-none-any"))
+    expected = {pep425.Tag("py3", "none", "any")}
+    assert compact.intersection(other) == expected
+    assert compact.intersection(pep425.parse_tag("py3.py4-none-any")) == expected
+
+
+def test_CompactTagSet_best_rank(priority_tags):
+    vocabulary = pep425.TagVocabulary()
+    ranks = vocabulary.encode_ranks(priority_tags)
+    tags = pep425.parse_tag("cp37.py3-abi3.none-manylinux1_x86_64.any")
+    assert pep425.CompactTagSet(vocabulary, tags).best_rank(ranks) == 1
+    tags = pep425.parse_tag("cp36-cp36m-manylinux1_x86_64")
+    assert pep425.CompactTagSet(vocabulary, tags).best_rank(ranks) is None
+
+
+def test_CompactTagIndex(priority_tags):
+    index = pep425.CompactTagIndex()
+    first = pep425.parse_tag("py2.py3-none-any")
+    second = pep425.parse_tag("cp37-cp37m-manylinux1_x86_64")
+    assert index.add(first) == 0
+    assert index.add(second) == 1
+    assert len(index) == 2
+    assert index[0] == first
+    assert index[-1] == second
+    with pytest.raises(IndexError):
+        index[2]
+    ranks = index.vocabulary.encode_ranks(priority_tags)
+    assert index.best_rank(0, ranks) == 2
+    assert index.best_rank(1, ranks) == 0
+    assert index.best_rank(-1, ranks) == 0
+    assert index.best_rank(-2, ranks) == 2
+    with pytest.raises(IndexError):
+        index.best_rank(2, ranks)
+    with pytest.raises(IndexError):
+        index.best_rank(-3, ranks)
+
+
+def test_CompactTagIndex_memory():
+    import tracemalloc
+
+    tag_strings = [
+        "cp{}-cp{}m-manylinux1_x86_64.linux_{}".format(minor, minor, build)
+        for minor in range(30, 40)
+        for build in range(500)
+    ]
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        frozensets = [pep425.parse_tag(tag_string) for tag_string in tag_strings]
+        frozenset_size = tracemalloc.get_traced_memory()[0] - before
+        before = tracemalloc.get_traced_memory()[0]
+        index = pep425.CompactTagIndex()
+        for tags in frozensets:
+            index.add(tags)
+        compact_size = tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+    assert compact_size * 10 < frozenset_size
+
+
+SIMPLE_INDEX_HTML = """<!DOCTYPE html>
+<html>
+  <body>
+    <h1>Links for pip</h1>
+    <a href="https://files.example/pip-18.0.tar.gz#sha256=abc">pip-18.0.tar.gz</a>
+    <a href="https://files.example/pip-18.0-py2.py3-none-any.whl#sha256=def"
+       data-requires-python="&gt;=2.7,!=3.0.*">pip-18.0-py2.py3-none-any.whl</a>
+    <a href="../../files/pip-18.1-py2.py3-none-any.whl" data-yanked>
+      pip-18.1-py2.py3-none-any.whl
+    </a>
+    <a href="/files/pip-19.0-py3-none-any.whl" data-yanked="broken"></a>
+  </body>
+</html>
+"""
+
+SIMPLE_INDEX_ENTRIES = [
+    pep425.IndexEntry(
+        "pip-18.0-py2.py3-none-any.whl",
+        "https://files.example/pip-18.0-py2.py3-none-any.whl",
+        {"sha256": "def"},
+        ">=2.7,!=3.0.*",
+    ),
+    pep425.IndexEntry(
+        "pip-18.1-py2.py3-none-any.whl",
+        "../../files/pip-18.1-py2.py3-none-any.whl",
+        yanked=True,
+    ),
+    pep425.IndexEntry(
+        "pip-19.0-py3-none-any.whl", "/files/pip-19.0-py3-none-any.whl", yanked="broken"
+    ),
+]
+
+
+def _simple_index_json():
+    files = [
+        {"filename": "pip-18.0.tar.gz", "url": "pip-18.0.tar.gz", "hashes": {}},
+        {
+            "filename": "pip-18.0-py2.py3-none-any.whl",
+            "url": "https://files.example/pip-18.0-py2.py3-none-any.whl",
+            "hashes": {"sha256": "def"},
+            "requires-python": ">=2.7,!=3.0.*",
+        },
+        {
+            "filename": "pip-18.1-py2.py3-none-any.whl",
+            "url": "../../files/pip-18.1-py2.py3-none-any.whl",
+            "hashes": {},
+            "yanked": True,
+        },
+        {
+            "filename": "pip-19.0-py3-none-any.whl",
+            "url": "/files/pip-19.0-py3-none-any.whl",
+            "hashes": {},
+            "yanked": "broken",
+        },
+    ]
+    page = {"meta": {"api-version": "1.0"}, "name": "pip", "files": files}
+    return json.dumps(page, indent=2)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_iter_simple_index_html(chunk_size):
+    file = io.BytesIO(SIMPLE_INDEX_HTML.encode("utf-8"))
+    entries = list(pep425.iter_simple_index(file, chunk_size=chunk_size))
+    assert entries == SIMPLE_INDEX_ENTRIES
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+def test_iter_simple_index_json(chunk_size):
+    file = io.BytesIO(_simple_index_json().encode("utf-8"))
+    entries = list(pep425.iter_simple_index(file, chunk_size=chunk_size))
+    assert entries == SIMPLE_INDEX_ENTRIES
+
+
+def test_iter_simple_index_text_and_content_type():
+    file = io.StringIO(_simple_index_json())
+    content_type = "application/vnd.pypi.simple.v1+json; charset=utf-8"
+    entries = list(pep425.iter_simple_index(file, content_type))
+    assert entries == SIMPLE_INDEX_ENTRIES
+    file = io.StringIO(SIMPLE_INDEX_HTML)
+    assert list(pep425.iter_simple_index(file, "text/html")) == SIMPLE_INDEX_ENTRIES
+
+
+def test_iter_simple_index_is_incremental():
+    page = io.BytesIO(SIMPLE_INDEX_HTML.encode("utf-8"))
+    entries = pep425.iter_simple_index(page, chunk_size=16)
+    next(entries)
+    assert page.tell() < len(SIMPLE_INDEX_HTML)
+
+
+def test_iter_simple_index_truncated_json():
+    page = _simple_index_json()
+    file = io.StringIO(page[: page.index("pip-19.0")])
+    with pytest.raises(ValueError):
+        list(pep425.iter_simple_index(file))
+
+
+def test_iter_simple_index_select_best(priority_tags):
+    file = io.BytesIO(SIMPLE_INDEX_HTML.encode("utf-8"))
+    best, rejected = pep425.select_best(pep425.iter_simple_index(file), priority_tags)
+    assert best == {"pip": SIMPLE_INDEX_ENTRIES[0]}
+    assert not rejected
+
+
+TARGET_ARGS = ["--implementation", "cp", "--python-version", "3.7"]
+TARGET_ARGS += ["--platform", "linux", "--arch", "x86_64", "--libc-version", "2.17"]
+
+
+def _target_index():
+    return pep425.TagPriorityIndex(
+        pep425.target_tags(
+            "cp", (3, 7), platform="linux", arch="x86_64", libc_version=(2, 17)
+        )
+    )
+
+
+def test_main_prints_tags(capsys):
+    assert pep425.main(TARGET_ARGS) == 0
+    expected = pep425.target_tags(
+        "cp", (3, 7), platform="linux", arch="x86_64", libc_version=(2, 17)
+    )
+    assert capsys.readouterr().out.splitlines() == [str(tag) for tag in expected]
+
+
+def test_main_target_requires_python_version(capsys):
+    with pytest.raises(SystemExit):
+        pep425.main(["--implementation", "cp"])
+
+
+def test_main_target_options_require_implementation(capsys):
+    with pytest.raises(SystemExit):
+        pep425.main(["--platform", "windows", "--arch", "amd64"])
+    assert "--platform, --arch" in capsys.readouterr().err
+    assert capsys.readouterr().out == ""
+
+
+BATCH_INPUT = """numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl
+numpy-1.15.0-cp36-cp36m-manylinux1_x86_64.whl
+not-a-wheel
+
+pip-18.0-py2.py3-none-any.whl
+numpy-1.15.0-py3-none-any.whl
+"""
+
+
+def test_main_batch_tsv(capsys, monkeypatch):
+    index = _target_index()
+    monkeypatch.setattr(sys, "stdin", io.StringIO(BATCH_INPUT))
+    assert pep425.main(TARGET_ARGS + ["--batch", "-"]) == 0
+    assert capsys.readouterr().out.splitlines() == [
+        "numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl\tcompatible\t{}".format(
+            index.rank(pep425.Tag("cp37", "cp37m", "manylinux1_x86_64"))
+        ),
+        "numpy-1.15.0-cp36-cp36m-manylinux1_x86_64.whl\tincompatible\t",
+        "not-a-wheel\tinvalid\t",
+        "pip-18.0-py2.py3-none-any.whl\tcompatible\t{}".format(
+            index.rank(pep425.Tag("py3", "none", "any"))
+        ),
+        "numpy-1.15.0-py3-none-any.whl\tcompatible\t{}".format(
+            index.rank(pep425.Tag("py3", "none", "any"))
+        ),
+    ]
+
+
+def test_main_batch_best_jsonl(capsys, tmp_path):
+    path = tmp_path / "wheels.txt"
+    path.write_text(BATCH_INPUT)
+    args = TARGET_ARGS + ["--batch", str(path), "--best", "--format", "jsonl"]
+    assert pep425.main(args + ["--stats"]) == 0
+    output = capsys.readouterr()
+    records = [json.loads(line) for line in output.out.splitlines()]
+    assert [(record["filename"], record["status"]) for record in records] == [
+        ("numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl", "best"),
+        ("pip-18.0-py2.py3-none-any.whl", "best"),
+    ]
+    assert "6 lines" in output.err
+    assert "lines/sec" in output.err
+
+
+def test_main_module():
+    output = _run_python("-m", "pep425", *TARGET_ARGS).stdout
+    assert output.splitlines()[0] == "cp37-cp37m-manylinux_2_17_x86_64"
+
+
+def test_main_broken_pipe():
+    process = subprocess.Popen(
+        [sys.executable, "-m", "pep425", "--batch", "-"],
+        cwd=os.path.dirname(os.path.abspath(pep425.__file__)),
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    process.stdout.close()
+    _, stderr = process.communicate(b"pip-18.0-py3-none-any.whl\n" * 100000)
+    assert process.returncode == 0
+    assert not stderr
+
+
+@pytest.fixture
+def wheelhouse(tmp_path):
+    root = tmp_path / "wheelhouse"
+    (root / "nested").mkdir(parents=True)
+    (root / "pip-18.0-py2.py3-none-any.whl").write_bytes(b"pip")
+    (root / "nested" / "numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl").write_bytes(
+        b"numpy"
+    )
+    (root / "nested" / "README.txt").write_text("Not a wheel.")
+    (root / "invalid.whl").write_bytes(b"")
+    return root
+
+
+def test_scan_wheelhouse_symlink_cycle(wheelhouse):
+    loop = wheelhouse / "nested" / "loop"
+    try:
+        loop.symlink_to(wheelhouse, target_is_directory=True)
+    except OSError:
+        pytest.skip("symbolic links are not supported")
+    entries = pep425.scan_wheelhouse(wheelhouse, processes=0)
+    assert entries == pep425.scan_wheelhouse(wheelhouse, processes=0)
+    assert len(entries) == 3
+
+
+def test_scan_wheelhouse(wheelhouse):
+    entries = pep425.scan_wheelhouse(wheelhouse, processes=0)
+    numpy_path = os.path.join("nested", "numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl")
+    assert set(entries) == {"pip-18.0-py2.py3-none-any.whl", numpy_path, "invalid.whl"}
+    entry = entries[numpy_path]
+    assert entry.path == numpy_path
+    assert entry.size == len(b"numpy")
+    assert entry.mtime == os.stat(os.path.join(wheelhouse, numpy_path)).st_mtime_ns
+    assert entry.tags == pep425.parse_tag("cp37-cp37m-manylinux1_x86_64")
+    assert entries["invalid.whl"].tags == frozenset()
+
+
+def test_scan_wheelhouse_process_pool(wheelhouse):
+    expected = pep425.scan_wheelhouse(wheelhouse, processes=0)
+    assert pep425.scan_wheelhouse(wheelhouse, processes=2, chunk_size=1) == expected
+
+
+def test_scan_wheelhouse_incremental(wheelhouse, tmp_path, monkeypatch):
+    index_path = tmp_path / "index.json"
+    first = pep425.scan_wheelhouse(wheelhouse, index_path, processes=0)
+    assert index_path.exists()
+
+    parsed = []
+    parse_wheel_chunk = pep425._parse_wheel_chunk
+
+    def counting_parse_wheel_chunk(paths):
+        parsed.extend(paths)
+        return parse_wheel_chunk(paths)
+
+    monkeypatch.setattr(pep425, "_parse_wheel_chunk", counting_parse_wheel_chunk)
+    assert pep425.scan_wheelhouse(wheelhouse, index_path, processes=0) == first
+    assert not parsed
+
+    (wheelhouse / "pip-18.0-py2.py3-none-any.whl").write_bytes(b"pip 18.0")
+    (wheelhouse / "pip-18.1-py3-none-any.whl").write_bytes(b"pip 18.1")
+    (wheelhouse / "invalid.whl").unlink()
+    entries = pep425.scan_wheelhouse(wheelhouse, index_path, processes=0)
+    assert sorted(parsed) == [
+        "pip-18.0-py2.py3-none-any.whl",
+        "pip-18.1-py3-none-any.whl",
+    ]
+    assert "invalid.whl" not in entries
+    assert entries["pip-18.1-py3-none-any.whl"].tags == pep425.parse_tag(
+        "py3-none-any"
+    )
+    assert pep425.scan_wheelhouse(wheelhouse, index_path, processes=0) == entries
+
+
+WHEEL_INDEX_FILES = [
+    "numpy-1.15.0-cp36-cp36m-manylinux1_x86_64.whl",
+    "numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl",
+    "numpy-1.15.0-cp37-abi3-manylinux1_x86_64.whl",
+    "pip-18.1-py2.py3-none-any.whl",
+    "pip-18.0-py2.py3-none-any.whl",
+]
+
+
+def test_WheelIndex(priority_tags):
+    with pep425.WheelIndex() as index:
+        index.add(WHEEL_INDEX_FILES)
+        index.add(WHEEL_INDEX_FILES[:1])
+        assert len(index) == len(WHEEL_INDEX_FILES)
+        assert WHEEL_INDEX_FILES[0] in index
+        index.set_tags(priority_tags)
+        assert index.best("numpy") == "numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl"
+        assert index.ranked("NumPy") == [
+            ("numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl", 0),
+            ("numpy-1.15.0-cp37-abi3-manylinux1_x86_64.whl", 1),
+        ]
+        assert index.best("pip") == "pip-18.0-py2.py3-none-any.whl"
+        assert index.best("missing") is None
+        path = os.path.join("wheels", "numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl")
+        assert path in index
+        index.remove(pathlib.Path(path))
+        assert path not in index
+        assert index.best("numpy") == "numpy-1.15.0-cp37-abi3-manylinux1_x86_64.whl"
+
+
+def test_WheelIndex_defaults_to_sys_tags(counted_sys_tags):
+    with pep425.WheelIndex() as index:
+        index.add(["pip-18.0-py3-none-any.whl", "numpy-1.15.0-cp37-cp37m-plat.whl"])
+        assert index.best("numpy") == "numpy-1.15.0-cp37-cp37m-plat.whl"
+        assert index.best("pip") == "pip-18.0-py3-none-any.whl"
+    tags, calls = counted_sys_tags
+    assert len(calls) == 1
+
+
+def test_WheelIndex_invalid_filename():
+    with pep425.WheelIndex() as index:
+        with pytest.raises(ValueError):
+            index.add(["pip-18.0-py3-none-any.whl", "invalid.whl"])
+        assert not len(index)
+
+
+def test_WheelIndex_persistent(tmp_path, priority_tags):
+    path = str(tmp_path / "wheels.sqlite3")
+    with pep425.WheelIndex(path) as index:
+        index.add(os.path.join("wheels", name) for name in WHEEL_INDEX_FILES)
+    with pep425.WheelIndex(path) as index:
+        assert len(index) == len(WHEEL_INDEX_FILES)
+        index.set_tags(priority_tags)
+        assert index.best("pip") == "pip-18.0-py2.py3-none-any.whl"
+
+
+def test_Instrumentation(monkeypatch):
+    config_vars = {"SOABI": None, "Py_DEBUG": 0, "WITH_PYMALLOC": 0}
+    monkeypatch.setattr(pep425, "_get_config_var", config_vars.get)
+    monkeypatch.setattr(pep425, "_get_platform", lambda: "silly-platform")
+    monkeypatch.setattr(platform, "system", lambda: "Sillysystem")
+    original = pep425._generic_platforms
+    calls = []
+    with pep425.Instrumentation(lambda *args: calls.append(args)) as stats:
+        assert pep425._generic_platforms is not original
+        tags = list(pep425.sys_tags())
+    assert pep425._generic_platforms is original
+    assert tags[-1] == pep425.Tag("py{}0".format(sys.version_info[0]), "none", "any")
+    for name in ("_interpreter_name", "_get_platform", "_generic_platforms"):
+        assert stats[name]["calls"] == 1
+        assert stats[name]["seconds"] >= 0
+    assert stats["_independent_tags"]["calls"] == 1
+    assert sorted(name for name, _ in calls) == sorted(
+        name for name, details in stats.items() for _ in range(details["calls"])
+    )
+
+
+def test_Instrumentation_generator_closed_early():
+    with pep425.Instrumentation() as stats:
+        tags = pep425._independent_tags("cp37", (3, 7), ["plat"])
+        next(tags)
+        tags.close()
+    assert stats["_independent_tags"]["calls"] == 1
+
+
+@pytest.fixture
+def glibc_cache(monkeypatch):
+    monkeypatch.setattr(pep425, "_glibc_version_cache", {})
+
+
+@pytest.mark.parametrize(
+    "confstr,expected",
+    [("glibc 2.17", "2.17"), ("musl", None), (None, None), (ValueError, None)],
+)
+def test_glibc_version_string_confstr(confstr, expected, monkeypatch):
+    def fake_confstr(name):
+        assert name == "CS_GNU_LIBC_VERSION"
+        if confstr is ValueError:
+            raise ValueError("unrecognized configuration name")
+        return confstr
+
+    monkeypatch.setattr(os, "confstr", fake_confstr, raising=False)
+    assert pep425._glibc_version_string_confstr() == expected
+
+
+def test_glibc_version_string_fallback(glibc_cache, monkeypatch):
+    monkeypatch.setattr(pep425, "_glibc_version_string_confstr", lambda: None)
+    monkeypatch.setattr(pep425, "_glibc_version_string_ctypes", lambda: "2.5")
+    assert pep425._glibc_version_string() == "2.5"
+
+
+def test_glibc_version_cached(glibc_cache, monkeypatch):
+    calls = []
+
+    def confstr():
+        calls.append(None)
+        return "2.28.9000"
+
+    monkeypatch.setattr(pep425, "_glibc_version_string_confstr", confstr)
+    assert pep425._glibc_version() == (2, 28)
+    assert pep425._glibc_version() == (2, 28)
+    assert len(calls) == 1
+
+
+def test_glibc_version_not_glibc(glibc_cache, monkeypatch):
+    monkeypatch.setattr(pep425, "_glibc_version_string_confstr", lambda: None)
+    monkeypatch.setattr(pep425, "_glibc_version_string_ctypes", lambda: None)
+    assert pep425._glibc_version() is None
+    assert not pep425._have_compatible_glibc(2, 5)
+
+
+@pytest.mark.parametrize(
+    "major,minimum_minor,expected",
+    [(2, 5, True), (2, 17, True), (2, 18, False), (3, 0, False)],
+)
+def test_have_compatible_glibc(major, minimum_minor, expected, monkeypatch):
+    monkeypatch.setattr(pep425, "_glibc_version", lambda: (2, 17))
+    assert pep425._have_compatible_glibc(major, minimum_minor) == expected
+
+
+@pytest.mark.skipif(
+    not hasattr(os, "confstr") or platform.libc_ver()[0] != "glibc",
+    reason="requires glibc",
+)
+def test_glibc_version_detection(glibc_cache):
+    expected = pep425._glibc_version_string_ctypes()
+    assert pep425._glibc_version_string_confstr() == expected
+    assert pep425._glibc_version_string() == expected
+
+
+@pytest.fixture
+def manylinux_module(monkeypatch):
+    module = types.ModuleType("_manylinux")
+    monkeypatch.setitem(sys.modules, "_manylinux", module)
+    return module
+
+
+def test_is_manylinux_compatible(manylinux_module):
+    assert pep425._is_manylinux_compatible((2, 17), "x86_64")
+    manylinux_module.manylinux2010_compatible = False
+    assert not pep425._is_manylinux_compatible((2, 12), "x86_64")
+    assert pep425._is_manylinux_compatible((2, 13), "x86_64")
+    manylinux_module.manylinux_compatible = lambda major, minor, arch: (
+        None if arch == "aarch64" else minor < 10
+    )
+    assert pep425._is_manylinux_compatible((2, 12), "aarch64")
+    assert not pep425._is_manylinux_compatible((2, 12), "x86_64")
+    assert pep425._is_manylinux_compatible((2, 9), "x86_64")
+
+
+def test_manylinux_platforms_is_lazy():
+    platforms = pep425._manylinux_platforms("x86_64", (2, 10 ** 9))
+    assert next(platforms) == "manylinux_2_1000000000_x86_64"
+
+
+def test_linux_platforms(manylinux_module, monkeypatch):
+    monkeypatch.setattr(pep425, "_get_platform", lambda: "linux-x86_64")
+    monkeypatch.setattr(pep425, "_glibc_version", lambda: (2, 13))
+    manylinux_module.manylinux1_compatible = False
+    assert pep425._linux_platforms(is_32bit=False) == [
+        "manylinux_2_13_x86_64",
+        "manylinux_2_12_x86_64",
+        "manylinux2010_x86_64",
+        "manylinux_2_11_x86_64",
+        "manylinux_2_10_x86_64",
+        "manylinux_2_9_x86_64",
+        "manylinux_2_8_x86_64",
+        "manylinux_2_7_x86_64",
+        "manylinux_2_6_x86_64",
+        "linux_x86_64",
+    ]
+    assert pep425._linux_platforms(is_32bit=True)[-3:] == [
+        "manylinux_2_7_i686",
+        "manylinux_2_6_i686",
+        "linux_i686",
+    ]
+
+
+def test_linux_platforms_not_glibc(monkeypatch):
+    monkeypatch.setattr(pep425, "_get_platform", lambda: "linux-aarch64")
+    monkeypatch.setattr(pep425, "_glibc_version", lambda: None)
+    assert pep425._linux_platforms(is_32bit=False) == ["linux_aarch64"]
+
+
+def test_sys_tags_on_linux(monkeypatch):
+    monkeypatch.setattr(platform, "system", lambda: "Linux")
+    monkeypatch.setattr(pep425, "_linux_platforms", lambda: ["manylinux1_x86_64"])
+    tags = list(pep425.sys_tags())
+    assert tags[0].platform == "manylinux1_x86_64"
+    assert tags[-1] == pep425.Tag("py{}0".format(sys.version_info[0]), "none", "any")
+
+
+TAG_SPACE_TARGETS = [
+    ("cp", (3, 7), None, "linux", "x86_64", (2, 17), None, None),
+    ("cp", (3, 8), None, "macos", "x86_64", None, (10, 14), None),
+    ("pp", (3, 6), "pypy3_60", "windows", "amd64", None, None, "pp360"),
+    ("jython", (2, 7), None, "java-1.8.0", None, None, None, None),
+    ("cp", (3, 2), "cp32mu", "linux", "i686", None, None, None),
+]
+
+
+@pytest.mark.parametrize("target", TAG_SPACE_TARGETS)
+def test_TagSpace_matches_target_tags(target):
+    tags = list(pep425.target_tags(*target))
+    space = pep425.target_tag_space(*target)
+    assert len(space) == len(tags)
+    assert list(space) == tags
+    assert [space[index] for index in range(len(tags))] == tags
+    assert space[-1] == tags[-1]
+    index = pep425.TagPriorityIndex(tags)
+    for tag in tags:
+        assert tag in space
+        assert space.rank(tag) == index.rank(tag)
+
+
+def test_TagSpace_missing():
+    space = pep425.target_tag_space("cp", (3, 7), platform="linux", arch="x86_64")
+    assert pep425.Tag("cp36", "cp36m", "linux_x86_64") not in space
+    assert space.rank(pep425.Tag("cp37", "cp37m", "any")) is None
+    with pytest.raises(IndexError):
+        space[len(space)]
+
+
+def test_TagSpace_best_rank():
+    space = pep425.target_tag_space(
+        "cp", (3, 7), platform="linux", arch="x86_64", libc_version=(2, 17)
+    )
+    index = pep425.TagPriorityIndex(space)
+    tags = pep425.parse_tag("cp37.py3-cp37m.none-manylinux1_x86_64.any")
+    assert space.best_rank(tags) == index.best_rank(tags)
+    assert space.best_rank(pep425.parse_tag("cp27-cp27mu-linux_x86_64")) is None
+    filenames = ["pip-18.0-py3-none-any.whl", "numpy-1.15.0-cp36-cp36m-any.whl"]
+    assert list(pep425.rank_wheels(filenames, space)) == list(
+        pep425.rank_wheels(filenames, index)
+    )
+
+
+def test_sys_tag_space():
+    assert list(pep425.sys_tag_space()) == list(pep425.sys_tags())
+
+
+MULTI_PLATFORM_TAG = "cp37-cp37m-macosx_10_6_intel.macosx_10_9_intel.macosx_10_9_x86_64.macosx_10_10_intel.macosx_10_10_x86_64"
+
+
+def test_TagProduct():
+    product = pep425.parse_tag_product(MULTI_PLATFORM_TAG)
+    expected = pep425.parse_tag(MULTI_PLATFORM_TAG)
+    assert len(product) == 5
+    assert product == expected
+    assert expected == product
+    assert hash(product) == hash(expected)
+    assert set(product) == expected
+    assert pep425.Tag("cp37", "cp37m", "macosx_10_9_x86_64") in product
+    assert pep425.Tag("cp37", "cp37m", "macosx_10_11_x86_64") not in product
+    assert product != pep425.parse_tag("cp37-cp37m-macosx_10_6_intel")
+    assert product == pep425.TagProduct(
+        ["CP37"], ["cp37m"], reversed(sorted(product.platforms))
+    )
+
+
+def test_TagProduct_intersection(example_tag):
+    product = pep425.parse_wheel_tag_product("pip-18.0-py2.py3-none-any.whl")
+    assert product == pep425.parse_wheel_tag("pip-18.0-py2.py3-none-any.whl")
+    target = [pep425.Tag("cp37", "cp37m", "any"), example_tag]
+    intersection = product.intersection(target)
+    assert intersection == {example_tag}
+    assert next(iter(intersection)) is example_tag
+    assert not product.isdisjoint(target)
+    assert product.isdisjoint(target[:1])
+
+
+def test_TagProduct_non_tags(example_tag):
+    product = pep425.parse_tag_product("py3-none-any")
+    assert "py3-none-any" not in product
+    assert None not in product
+    assert product != {"py3-none-any"}
+    assert product.isdisjoint(["py3-none-any", ("py3", "none", "any")])
+    assert not product.isdisjoint(["py3-none-any", example_tag])
+
+
+@pytest.mark.parametrize("target", TAG_SPACE_TARGETS)
+@pytest.mark.parametrize(
+    "tag",
+    [
+        "cp37.py3-cp37m.abi3.none-manylinux1_x86_64.macosx_10_9_x86_64.any",
+        "py2.py3-none-any",
+        "cp35.cp36.cp37-abi3-manylinux2014_x86_64.win_amd64",
+        "pp360-pypy3_60.none-win_amd64",
+        "cp27-cp27mu-linux_x86_64",
+    ],
+)
+def test_TagSpace_best_rank_product(target, tag):
+    space = pep425.target_tag_space(*target)
+    assert space.best_rank(pep425.parse_tag_product(tag)) == space.best_rank(
+        pep425.parse_tag(tag)
+    )
+
+
+@pytest.fixture
+def async_sys_tags_cache(monkeypatch):
+    monkeypatch.setattr(pep425, "_async_sys_tags_result", [])
+    monkeypatch.setattr(pep425, "_async_sys_tags_pending", {})
+
+
+def test_async_sys_tags(counted_sys_tags, async_sys_tags_cache, monkeypatch):
+    import asyncio
+    import threading
+
+    tags, calls = counted_sys_tags
+    threads = []
+    sys_tags = pep425.sys_tags
+
+    def tracking_sys_tags():
+        threads.append(threading.current_thread())
+        return sys_tags()
+
+    monkeypatch.setattr(pep425, "sys_tags", tracking_sys_tags)
+
+    async def main():
+        return await asyncio.gather(*(pep425.async_sys_tags() for _ in range(3)))
+
+    results = asyncio.run(main())
+    assert results == [tuple(tags)] * 3
+    assert asyncio.run(pep425.async_sys_tags()) == tuple(tags)
+    assert len(calls) == 1
+    assert threads[0] is not threading.main_thread()
+
+
+async def _serve_filenames(filenames_by_project):
+    """Start a fake index server returning the file names of a project."""
+    import asyncio
+
+    async def handle(reader, writer):
+        project = (await reader.readline()).decode().strip()
+        for filename in filenames_by_project[project]:
+            writer.write(filename.encode() + b"\n")
+            await writer.drain()
+            await asyncio.sleep(0)
+        writer.close()
+
+    return await asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+async def _fetch_filenames(port, projects):
+    """Fetch the file names of 'projects' concurrently from the fake server."""
+    import asyncio
+
+    queue = asyncio.Queue()
+
+    async def fetch(project):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(project.encode() + b"\n")
+        async for line in reader:
+            await queue.put(line.decode().strip())
+        writer.close()
+
+    fetches = asyncio.gather(*map(fetch, projects))
+    fetches.add_done_callback(lambda _: queue.put_nowait(None))
+    while True:
+        filename = await queue.get()
+        if filename is None:
+            break
+        yield filename
+    await fetches
+
+
+def test_async_select_best(priority_tags):
+    import asyncio
+
+    filenames_by_project = {
+        "numpy": [
+            "numpy-1.15.0-py3-none-any.whl",
+            "numpy-1.15.0-cp36-cp36m-manylinux1_x86_64.whl",
+            "numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl",
+            "numpy-1.15.0-cp37-abi3-manylinux1_x86_64.whl",
+        ],
+        "pip": [
+            "pip-18.0.tar.gz",
+            "pip-18.0-py2.py3-none-any.whl",
+            "pip-18.1-py2.py3-none-any.whl",
+        ],
+    }
+
+    async def main():
+        server = await _serve_filenames(filenames_by_project)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            filenames = _fetch_filenames(port, filenames_by_project)
+            return [
+                result
+                async for result in pep425.async_select_best(filenames, priority_tags)
+            ]
+
+    results = asyncio.run(main())
+    assert [result for result in results if result[0] == "numpy"] == [
+        ("numpy", "numpy-1.15.0-py3-none-any.whl", 2),
+        ("numpy", "numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl", 0),
+    ]
+    assert [result for result in results if result[0] == "pip"] == [
+        ("pip", "pip-18.0-py2.py3-none-any.whl", 2)
+    ]
+
+
+def test_async_select_best_defaults_to_sys_tags(counted_sys_tags, async_sys_tags_cache):
+    import asyncio
+
+    async def filenames():
+        yield "numpy-1.15.0-cp37-cp37m-plat.whl"
+        yield "numpy-1.15.0-cp36-cp36m-plat.whl"
+
+    async def main():
+        return [result async for result in pep425.async_select_best(filenames())]
+
+    assert asyncio.run(main()) == [("numpy", "numpy-1.15.0-cp37-cp37m-plat.whl", 0)]
+
+
+def test_parse_wheel_filename(example_tag):
+    path = os.path.join("some", "location", "gidgethub-3.0.0-py3-none-any.whl")
+    parsed = pep425.parse_wheel_filename(path)
+    assert parsed.name == "gidgethub"
+    assert parsed.version == "3.0.0"
+    assert parsed.build == ()
+    assert parsed.tags == {example_tag}
+
+
+def test_parse_wheel_filename_build_tag():
+    parsed = pep425.parse_wheel_filename(
+        "numpy-1.15.0-12b-cp37-cp37m-manylinux1_x86_64.whl"
+    )
+    assert parsed == pep425.WheelFilename(
+        "numpy",
+        "1.15.0",
+        (12, "b"),
+        pep425.parse_tag("cp37-cp37m-manylinux1_x86_64"),
+    )
+    assert pep425.parse_wheel_filename("pip-18.0-1-py3-none-any.whl").build == (1, "")
+
+
+@pytest.mark.parametrize(
+    "filename",
+    [
+        "pip-18.0-py3-none-any.tar.gz",
+        "pip-py3-none-any.whl",
+        "pip-18.0-b1-py3-none-any.whl",
+        "pip-18.0-1-2-py3-none-any.whl",
+        "pip--py3-none-any.whl",
+        "pip-18.0-py3-none-.whl",
+    ],
+)
+def test_parse_wheel_filename_invalid(filename):
+    with pytest.raises(ValueError):
+        pep425.parse_wheel_filename(filename)
+
+
+def test_parse_wheel_filenames():
+    filenames = ["pip-18.0-py3-none-any.whl", "invalid.whl"]
+    with pytest.raises(ValueError):
+        pep425.parse_wheel_filenames(filenames)
+    parsed = pep425.parse_wheel_filenames(filenames, skip_invalid=True)
+    assert [wheel.name for wheel in parsed] == ["pip"]
+
+
+BUILD_WHEELS = [
+    "numpy-1.15.0-py3-none-any.whl",
+    "numpy-1.15.0-2-cp37-abi3-manylinux1_x86_64.whl",
+    "numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl",
+    "numpy-1.15.0-10-cp37-cp37m-manylinux1_x86_64.whl",
+    "numpy-1.15.0-2a-cp37-cp37m-manylinux1_x86_64.whl",
+    "numpy-1.15.0-2-cp37-cp37m-manylinux1_x86_64.whl",
+    "numpy-1.15.0-2ab-cp37-cp37m-manylinux1_x86_64.whl",
+    "numpy-1.15.0-cp27-cp27mu-manylinux1_x86_64.whl",
+    "numpy-1.14.0-cp37-cp37m-manylinux1_x86_64.whl",
+]
+
+BUILD_WHEELS_SORTED = [
+    "numpy-1.15.0-10-cp37-cp37m-manylinux1_x86_64.whl",
+    "numpy-1.15.0-2ab-cp37-cp37m-manylinux1_x86_64.whl",
+    "numpy-1.15.0-2a-cp37-cp37m-manylinux1_x86_64.whl",
+    "numpy-1.15.0-2-cp37-cp37m-manylinux1_x86_64.whl",
+    "numpy-1.14.0-cp37-cp37m-manylinux1_x86_64.whl",
+    "numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl",
+    "numpy-1.15.0-2-cp37-abi3-manylinux1_x86_64.whl",
+    "numpy-1.15.0-py3-none-any.whl",
+    "numpy-1.15.0-cp27-cp27mu-manylinux1_x86_64.whl",
+]
+
+
+def test_wheel_sort_key(priority_tags):
+    key = pep425.wheel_sort_key(priority_tags)
+    assert sorted(BUILD_WHEELS, key=key) == BUILD_WHEELS_SORTED
+    with pytest.raises(ValueError):
+        key("invalid.whl")
+
+
+@pytest.mark.parametrize("n", [0, 1, 3, 8, 100])
+def test_best_n(priority_tags, n):
+    assert pep425.best_n(BUILD_WHEELS, n, priority_tags) == BUILD_WHEELS_SORTED[:8][:n]
+
+
+def test_best_n_default(priority_tags):
+    best = pep425.best_n(iter(BUILD_WHEELS), tags=priority_tags)
+    assert best == BUILD_WHEELS_SORTED[:1]
+    assert not pep425.best_n(BUILD_WHEELS[-2:-1], tags=priority_tags)
+
+
+TAG_INDEX_WHEELS = {
+    "numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl": pep425.parse_tag(
+        "cp37-cp37m-manylinux1_x86_64"
+    ),
+    "six-1.11.0-py2.py3-none-any.whl": pep425.parse_tag("py2.py3-none-any"),
+    "spam-1.0-cp27-cp27mu-manylinux1_x86_64.whl": pep425.parse_tag(
+        "cp27-cp27mu-manylinux1_x86_64"
+    ),
+}
+
+
+@pytest.fixture
+def tag_index(tmp_path, priority_tags):
+    path = tmp_path / "tags.idx"
+    pep425.write_tag_index(path, TAG_INDEX_WHEELS, priority=priority_tags)
+    with pep425.open_tag_index(path) as index:
+        yield index
+
+
+def test_tag_index_wheels(tag_index):
+    assert len(tag_index) == 3
+    assert sorted(tag_index) == sorted(TAG_INDEX_WHEELS)
+    assert {filename: tag_index[filename] for filename in tag_index} == TAG_INDEX_WHEELS
+    assert "six-1.11.0-py2.py3-none-any.whl" in tag_index
+    assert "missing-1.0-py3-none-any.whl" not in tag_index
+    with pytest.raises(KeyError):
+        tag_index["missing-1.0-py3-none-any.whl"]
+
+
+def test_tag_index_tags(tag_index, priority_tags):
+    tags = set(priority_tags).union(*TAG_INDEX_WHEELS.values())
+    assert set(tag_index.tags()) == tags
+    assert all(map(tag_index.has_tag, tags))
+    assert not tag_index.has_tag(pep425.Tag("cp37", "cp37m", "win32"))
+    assert not tag_index.has_tag(pep425.Tag("cp99", "cp99", "any"))
+    assert [tag_index.rank(tag) for tag in priority_tags] == [0, 1, 2]
+    assert tag_index.rank(pep425.Tag("py2", "none", "any")) is None
+
+
+def test_tag_index_wheel_best_rank(tag_index):
+    best_rank = tag_index.wheel_best_rank
+    assert best_rank("numpy-1.15.0-cp37-cp37m-manylinux1_x86_64.whl") == 0
+    assert best_rank("six-1.11.0-py2.py3-none-any.whl") == 2
+    assert best_rank("spam-1.0-cp27-cp27mu-manylinux1_x86_64.whl") is None
+    with pytest.raises(KeyError):
+        best_rank("missing-1.0-py3-none-any.whl")
+
+
+def test_tag_index_as_priority(tag_index, priority_tags):
+    assert tag_index.best_rank(pep425.parse_tag("cp37.py3-abi3.none-any")) == 2
+    assert tag_index.best_rank(pep425.parse_tag("py2-none-any")) is None
+    filenames = list(TAG_INDEX_WHEELS)
+    assert pep425.select_best(filenames, tag_index) == pep425.select_best(
+        filenames, priority_tags
+    )
+    assert pep425.best_n(filenames, 3, tag_index) == pep425.best_n(
+        filenames, 3, priority_tags
+    )
+
+
+def test_tag_index_buffer(priority_tags):
+    data = pep425._pack_tag_index(tags=priority_tags)
+    index = pep425.TagIndexView(data)
+    assert not len(index)
+    assert list(index.tags()) == sorted(priority_tags, key=lambda tag: tag._tags)
+    with pytest.raises(ValueError):
+        pep425.TagIndexView(b"not an index" * 4)
+    with pytest.raises(ValueError):
+        pep425.TagIndexView(data[:-4])
+
+
+def test_open_tag_index_invalid(tmp_path):
+    path = tmp_path / "tags.idx"
+    path.write_bytes(b"not an index" * 4)
+    with pytest.raises(ValueError):
+        pep425.open_tag_index(path)
+
+
+@pytest.fixture
+def shared_tag_index(priority_tags):
+    block = pep425.publish_tag_index(TAG_INDEX_WHEELS, priority=priority_tags)
+    yield block
+    block.close()
+    block.unlink()
+
+
+def test_attach_tag_index(shared_tag_index):
+    with pep425.attach_tag_index(shared_tag_index.name) as index:
+        assert {filename: index[filename] for filename in index} == TAG_INDEX_WHEELS
+        assert index.wheel_best_rank("six-1.11.0-py2.py3-none-any.whl") == 2
+        assert index._buffer.readonly
+
+
+SPAWN_ATTACH_SCRIPT = """
+import multiprocessing
+import sys
+
+sys.path.insert(0, {directory!r})
+
+import pep425
+
+
+def worker(name, queue):
+    with pep425.attach_tag_index(name) as index:
+        queue.put(len(index))
+
+
+if __name__ == "__main__":
+    block = pep425.publish_tag_index({{"pip-18.0-py3-none-any.whl": []}})
+    context = multiprocessing.get_context({method!r})
+    queue = context.Queue()
+    process = context.Process(target=worker, args=(block.name, queue))
+    process.start()
+    print(queue.get())
+    process.join()
+    block.close()
+    block.unlink()
+"""
+
+
+@pytest.mark.parametrize("method", ["spawn", "forkserver"])
+def test_attach_tag_index_from_spawned_worker(tmp_path, method):
+    import multiprocessing
+
+    if method not in multiprocessing.get_all_start_methods():
+        pytest.skip("{} is not supported".format(method))
+    script = tmp_path / "spawn_attach.py"
+    directory = os.path.dirname(os.path.abspath(pep425.__file__))
+    script.write_text(SPAWN_ATTACH_SCRIPT.format(directory=directory, method=method))
+    result = _run_python(str(script))
+    assert result.stdout.split() == ["1"]
+    # The resource tracker complains if the publisher's registration is gone.
+    assert not result.stderr
+
+
+def test_attach_tag_index_from_other_process(shared_tag_index):
+    code = (
+        "import pep425\n"
+        "with pep425.attach_tag_index({!r}) as index:\n"
+        "    print(len(index), index.wheel_best_rank({!r}))\n"
+    ).format(shared_tag_index.name, "six-1.11.0-py2.py3-none-any.whl")
+    result = _run_python("-c", code)
+    assert result.stdout.split() == ["3", "2"]
+    assert "leaked" not in result.stderr
+    # The block survives the other process detaching.
+    with pep425.attach_tag_index(shared_tag_index.name) as index:
+        assert len(index) == 3
+
+
+@pytest.mark.parametrize(
+    "platform,os_name,version,arch",
+    [
+        ("macosx_10_9_x86_64", "macosx", (10, 9), "x86_64"),
+        ("macosx_11_0_universal2", "macosx", (11, 0), "universal2"),
+        ("manylinux1_i686", "manylinux", (2, 5), "i686"),
+        ("manylinux2010_x86_64", "manylinux", (2, 12), "x86_64"),
+        ("manylinux2014_aarch64", "manylinux", (2, 17), "aarch64"),
+        ("manylinux_2_24_ppc64le", "manylinux", (2, 24), "ppc64le"),
+        ("musllinux_1_2_x86_64", "musllinux", (1, 2), "x86_64"),
+        ("linux_x86_64", "linux", None, "x86_64"),
+        ("win_amd64", "win", None, "amd64"),
+        ("win32", "win", None, "x86"),
+        ("any", "any", None, None),
+    ],
+)
+def test_parse_platform(platform, os_name, version, arch):
+    platform_tag = pep425.parse_platform(platform)
+    assert (platform_tag.os, platform_tag.version, platform_tag.arch) == (
+        os_name,
+        version,
+        arch,
+    )
+    assert str(platform_tag) == platform
+    assert pep425.parse_platform(platform) is platform_tag
+
+
+PLATFORM_INDEX_WHEELS = [
+    "a-1.0-cp37-cp37m-macosx_10_6_intel.whl",
+    "b-1.0-cp37-cp37m-macosx_10_9_x86_64.whl",
+    "c-1.0-cp37-cp37m-macosx_10_13_x86_64.whl",
+    "d-1.0-cp37-cp37m-macosx_10_9_x86_64.macosx_11_0_arm64.whl",
+    "e-1.0-cp37-cp37m-manylinux1_x86_64.manylinux2010_x86_64.whl",
+    "f-1.0-cp37-cp37m-manylinux_2_24_x86_64.whl",
+    "g-1.0-cp37-cp37m-linux_x86_64.whl",
+    "h-1.0-py3-none-any.whl",
+    "i-1.0-cp37-cp37m-macosx_10_15_universal2.whl",
+]
+
+
+def test_PlatformIndex_select():
+    index = pep425.PlatformIndex(PLATFORM_INDEX_WHEELS)
+    select = index.select
+    assert select("macosx", "x86_64", max_version=(10, 12)) == [
+        "a-1.0-cp37-cp37m-macosx_10_6_intel.whl",
+        "b-1.0-cp37-cp37m-macosx_10_9_x86_64.whl",
+        "d-1.0-cp37-cp37m-macosx_10_9_x86_64.macosx_11_0_arm64.whl",
+    ]
+    assert select("macosx", "x86_64", max_version=(10, 16)) == [
+        "a-1.0-cp37-cp37m-macosx_10_6_intel.whl",
+        "b-1.0-cp37-cp37m-macosx_10_9_x86_64.whl",
+        "d-1.0-cp37-cp37m-macosx_10_9_x86_64.macosx_11_0_arm64.whl",
+        "c-1.0-cp37-cp37m-macosx_10_13_x86_64.whl",
+        "i-1.0-cp37-cp37m-macosx_10_15_universal2.whl",
+    ]
+    assert select("macosx", "arm64", max_version=(12, 0)) == [
+        "i-1.0-cp37-cp37m-macosx_10_15_universal2.whl",
+        "d-1.0-cp37-cp37m-macosx_10_9_x86_64.macosx_11_0_arm64.whl",
+    ]
+    assert select("macosx", "x86_64", min_version=(10, 10)) == [
+        "c-1.0-cp37-cp37m-macosx_10_13_x86_64.whl",
+        "i-1.0-cp37-cp37m-macosx_10_15_universal2.whl",
+    ]
+    assert select("macosx", min_version=(10, 7)) == [
+        "b-1.0-cp37-cp37m-macosx_10_9_x86_64.whl",
+        "d-1.0-cp37-cp37m-macosx_10_9_x86_64.macosx_11_0_arm64.whl",
+        "c-1.0-cp37-cp37m-macosx_10_13_x86_64.whl",
+        "i-1.0-cp37-cp37m-macosx_10_15_universal2.whl",
+    ]
+    assert select("manylinux", "x86_64", max_version=(2, 17)) == [
+        "e-1.0-cp37-cp37m-manylinux1_x86_64.manylinux2010_x86_64.whl"
+    ]
+    assert select("linux", "x86_64") == ["g-1.0-cp37-cp37m-linux_x86_64.whl"]
+    assert select("any") == ["h-1.0-py3-none-any.whl"]
+    assert select("win", "amd64") == []
+
+
+def test_inspect_elf_sys_executable():
+    if not sys.platform.startswith("linux"):
+        pytest.skip("only Linux interpreters are ELF files")
+    info = pep425.inspect_elf(sys.executable)
+    machine = platform.machine()
+    if pep425._32_BIT_INTERPRETER and machine == "x86_64":
+        machine = "i686"
+    assert info.arch == machine
+    glibc_version = pep425._glibc_version()
+    if glibc_version is None:
+        assert info.glibc_version is None
+    else:
+        assert info.libc == "glibc"
+        assert info.glibc_version <= glibc_version
+        assert info.platforms()[-1] == "linux_{}".format(machine)
+
+
+def _elf_file(path, interpreter, machine=183):
+    """Write a minimal 64-bit little-endian ELF file with a PT_INTERP header."""
+    import struct
+
+    interpreter = interpreter.encode() + b"\0"
+    header = b"\x7fELF\2\1\1" + b"\0" * 9
+    header += struct.pack(
+        "<HHIQQQIHHHHHH", 2, machine, 1, 0, 64, 0, 0, 64, 56, 1, 0, 0, 0
+    )
+    program = struct.pack("<IIQQQQQQ", 3, 4, 120, 0, 0, len(interpreter), 0, 1)
+    path.write_bytes(header + program + interpreter)
+    return path
+
+
+def test_inspect_elf_musl(tmp_path):
+    path = _elf_file(tmp_path / "python", "/lib/ld-musl-aarch64.so.1")
+    info = pep425.inspect_elf(path)
+    assert info == pep425.ElfInfo("aarch64", "musl", None, "/lib/ld-musl-aarch64.so.1")
+    assert info.platforms() == ["linux_aarch64"]
+
+
+@pytest.mark.parametrize("data", [b"", b"#!/bin/sh\n", b"\x7fELF\2\1\1" + b"\0" * 20])
+def test_inspect_elf_invalid(tmp_path, data):
+    path = tmp_path / "python"
+    path.write_bytes(data)
+    with pytest.raises(ValueError):
+        pep425.inspect_elf(path)